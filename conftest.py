@@ -0,0 +1,13 @@
+import pytest
+from django.test.utils import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def server_timing_sampling_off():
+    """То же, что core.test_runner.TestRunner, но для запуска через pytest.
+
+    Без этого случайная доля запросов пишет в консоль строки
+    yatube.timing, и вывод тестов меняется от запуска к запуску.
+    """
+    with override_settings(SERVER_TIMING_SAMPLE_RATE=0):
+        yield
@@ -0,0 +1,36 @@
+from django.contrib import admin
+
+from .models import Job, QueuedEmail
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'recipients',
+        'status',
+        'attempts',
+        'next_attempt',
+        'sent',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients', 'subject')
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'task',
+        'priority',
+        'status',
+        'attempts',
+        'run_after',
+        'finished',
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('key',)
+    readonly_fields = ('last_error',)
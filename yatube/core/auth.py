@@ -0,0 +1,91 @@
+"""Пользователь запроса из кэша вместо запроса к auth_user.
+
+Объект пользователя кэшируется под ключом с версией; версия меняется при
+каждом сохранении пользователя (смена и сброс пароля, last_login, правка
+профиля) и при выходе, поэтому старая запись больше не читается. Проверка
+хэша сессии остаётся как в django.contrib.auth.get_user: после смены
+пароля другие сессии пользователя перестают действовать.
+
+Кэш нужен общий для всех процессов: при AUTH_USER_CACHE_TIMEOUT = 0
+(так настроено для кэша в памяти процесса) пользователь читается из базы.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model, load_backend)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_KEY = 'auth:user:{}:{}'
+VERSION_KEY = 'auth:user_version:{}'
+
+
+def _user_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Как у лент: вытесненная версия не совпадёт ни с одной прежней.
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+    return version
+
+
+def bump_user_version(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def cached_user(backend_path, user_id):
+    key = USER_KEY.format(user_id, _user_version(user_id))
+    user = cache.get(key)
+    if user is None:
+        user = load_backend(backend_path).get_user(user_id)
+        if user is not None:
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    """django.contrib.auth.get_user с пользователем из кэша."""
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY]
+        )
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    if settings.AUTH_USER_CACHE_TIMEOUT:
+        user = cached_user(backend_path, user_id)
+    else:
+        user = load_backend(backend_path).get_user(user_id)
+    if user is None:
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+def _lazy_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware, который берёт пользователя из кэша."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _lazy_user(request))
@@ -0,0 +1,147 @@
+import random
+import time
+from collections import Counter
+from importlib import import_module
+from statistics import median
+
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from mixer.backend.django import mixer
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import rebuild_timeline
+
+URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+PERCENTILES = (50, 95, 99)
+# Отдельный кэш, чтобы замеры не смешивались с рабочими фрагментами.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+
+def seed(users=20, groups=5, posts=200, comments=500, follows=5,
+         random_seed=0):
+    """Заполняет базу случайными данными через mixer."""
+    random.seed(random_seed)
+    mixer.faker.seed_instance(random_seed)
+    people = mixer.cycle(users).blend(
+        User, username=mixer.sequence('user{0}')
+    )
+    mixer.cycle(groups).blend(Group, slug=mixer.sequence('group-{0}'))
+    mixer.cycle(posts).blend(
+        Post, author=mixer.SELECT, group=mixer.SELECT, image=''
+    )
+    mixer.cycle(comments).blend(
+        Comment, post=mixer.SELECT, author=mixer.SELECT
+    )
+    for user in people:
+        others = [person for person in people if person != user]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for author in random.sample(others, min(follows, len(others)))
+        )
+        rebuild_timeline(user)
+
+
+def route_params():
+    """Значения параметров маршрутов на засеянных данных."""
+    post = Post.objects.exclude(group=None).order_by(
+        '-comments_count', '-pk'
+    ).select_related('author', 'group').first()
+    user = User.objects.exclude(pk=post.author_id).order_by('pk').first()
+    return user, {
+        'post_id': post.pk,
+        'username': post.author.username,
+        'slug': post.group.slug,
+        'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+        'token': default_token_generator.make_token(user),
+    }
+
+
+def routes(params, urlconfs=URLCONFS):
+    """Возвращает пары (имя маршрута, URL) для всех маршрутов приложений."""
+    for urlconf in urlconfs:
+        module = import_module(urlconf)
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {key: params[key] for key in pattern.pattern.converters}
+            yield name, reverse(name, kwargs=kwargs)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    index = round(len(values) * share / 100) - 1
+    return values[max(0, min(len(values) - 1, index))]
+
+
+def measure(client, url, requests, warmup=3, after_request=None):
+    """Запрашивает URL и возвращает задержку, число запросов и размер."""
+    timings, queries, sizes, statuses = [], [], [], Counter()
+    for number in range(warmup + requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = len(b''.join(response.streaming_content))
+            else:
+                size = len(response.content)
+            elapsed = time.perf_counter() - started
+        if after_request is not None:
+            after_request()
+        if number < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        sizes.append(size)
+        statuses[response.status_code] += 1
+    result = {
+        f'p{share}': round(percentile(timings, share), 2)
+        for share in PERCENTILES
+    }
+    result.update(
+        queries=int(median(queries)),
+        size=int(median(sizes)),
+        status=statuses.most_common(1)[0][0],
+    )
+    return result
+
+
+def compare(results, baseline, threshold=0.25, min_delta=5.0,
+            metric='p50'):
+    """Возвращает описания регрессий относительно базовых замеров.
+
+    Регрессия — смена кода ответа, рост числа запросов или рост metric
+    больше чем на threshold и больше чем на min_delta миллисекунд.
+    Хвосты p95/p99 на небольшом числе замеров шумят, поэтому по умолчанию
+    сравнивается медиана.
+    """
+    regressions = []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{key}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        slower = current[metric] - previous[metric]
+        if slower > min_delta and slower > previous[metric] * threshold:
+            regressions.append(
+                f'{key}: {metric} {previous[metric]} -> '
+                f'{current[metric]} мс'
+            )
+        if current['status'] != previous['status']:
+            regressions.append(
+                f'{key}: статус {previous["status"]} -> {current["status"]}'
+            )
+    return regressions
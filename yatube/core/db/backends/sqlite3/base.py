@@ -0,0 +1,106 @@
+"""SQLite с настройками для нескольких одновременных процессов и потоков.
+
+Каждое соединение включает WAL и прочие PRAGMA из SQLITE_PRAGMAS.
+Блоки transaction.atomic открываются через BEGIN IMMEDIATE: блокировка
+на запись берётся сразу, и транзакция не упадёт с «database is locked»
+посередине, когда чтение сменится записью. Внутри процесса такие блоки
+выполняются по очереди под общей блокировкой, чтобы потоки не ждали
+друг друга в цикле ожидания SQLite; не дождавшись её за busy_timeout,
+atomic падает с OperationalError, как и сама SQLite. Одиночные запросы
+вне транзакции при занятой базе повторяются SQLITE_LOCK_RETRIES раз.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+Database = base.Database
+
+_write_locks = {}
+_write_locks_lock = threading.Lock()
+
+
+def _write_lock(name):
+    with _write_locks_lock:
+        return _write_locks.setdefault(name, threading.Lock())
+
+
+def _is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    def _retry(self, method, *args):
+        attempt = 0
+        while True:
+            try:
+                return method(self, *args)
+            except Database.OperationalError as error:
+                # В открытой транзакции повтор одного запроса не поможет.
+                if (not _is_locked(error) or self.connection.in_transaction
+                        or attempt >= settings.SQLITE_LOCK_RETRIES):
+                    raise
+            time.sleep(0.05 * 2 ** attempt)
+            attempt += 1
+
+    def execute(self, query, params=None):
+        return self._retry(base.SQLiteCursorWrapper.execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(
+            base.SQLiteCursorWrapper.executemany, query, param_list
+        )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    write_lock = None
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(factory=SQLiteCursorWrapper)
+
+    def _start_transaction_under_autocommit(self):
+        # База в памяти живёт в одном процессе, ждать там некого.
+        if not self.is_in_memory_db():
+            lock = _write_lock(self.settings_dict['NAME'])
+            timeout = settings.SQLITE_PRAGMAS.get('busy_timeout', 5000)
+            # Как и сама SQLite после busy_timeout: без блокировки
+            # транзакция не начинается.
+            if not lock.acquire(timeout=timeout / 1000):
+                raise OperationalError('database is locked')
+            self.write_lock = lock
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except Exception:
+            self._release_write_lock()
+            raise
+
+    def _release_write_lock(self):
+        lock, self.write_lock = self.write_lock, None
+        if lock is not None:
+            lock.release()
+
+    def _commit(self):
+        try:
+            super()._commit()
+        finally:
+            self._release_write_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self._release_write_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self._release_write_lock()
@@ -0,0 +1,53 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def reset():
+    """Начинает запрос: чтение из основной базы, записей ещё не было."""
+    _state.replica = False
+    _state.wrote = False
+
+
+def allow_replica():
+    """Разрешает чтение с реплик в текущем потоке до следующего reset."""
+    _state.replica = True
+
+
+def wrote():
+    """Были ли записи в основную базу с последнего reset."""
+    return getattr(_state, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+    """Пишет в основную базу, читает с реплик, если это разрешено.
+
+    Чтение с реплик разрешает ReplicaMiddleware для GET-запросов к страницам
+    posts; всё остальное, в том числе чтение внутри транзакции, идёт в
+    основную базу. Сессии и пользователи всегда читаются из основной базы:
+    на реплике может ещё не быть только что созданной сессии.
+    """
+    app_labels = ('posts',)
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if (not replicas or not getattr(_state, 'replica', False)
+                or model._meta.app_label not in self.app_labels
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными основной базы.
+        return db not in settings.REPLICA_DATABASES
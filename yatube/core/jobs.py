@@ -0,0 +1,143 @@
+"""Фоновые задачи в базе.
+
+Функция становится задачей через декоратор task:
+
+    @task(priority=5, max_attempts=3)
+    def make_thumbnails(image_name):
+        ...
+
+    make_thumbnails.enqueue_on_commit(name, key=f'thumbnails:{name}')
+
+Задача ставится в очередь после фиксации транзакции, запрос не ждёт её
+выполнения. manage.py run_jobs забирает задачи по приоритету в пул потоков
+или процессов. Забранная задача не видна другим воркерам timeout секунд;
+если воркер за это время не отчитался, её выполнит другой. Ошибки
+повторяются с растущей задержкой, пока не кончатся max_attempts. Задачу
+с ключом идемпотентности не ставят, пока задача с тем же ключом ждёт
+в очереди или выполняется; после её завершения ключ снова свободен.
+"""
+import json
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+class Task:
+    def __init__(self, func, priority=0, max_attempts=None, timeout=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, key=None, priority=None, delay=0, **kwargs):
+        """Ставит задачу в очередь и возвращает Job.
+
+        Если задача с таким key ждёт в очереди или выполняется,
+        возвращает её.
+        """
+        job = Job(
+            task=self.name,
+            payload=json.dumps({'args': args, 'kwargs': kwargs}),
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts or settings.JOB_MAX_ATTEMPTS,
+            timeout=self.timeout or settings.JOB_VISIBILITY_TIMEOUT,
+            run_after=timezone.now() + timedelta(seconds=delay),
+            key=key,
+        )
+        if key is None:
+            job.save()
+            return job
+        while True:
+            try:
+                with transaction.atomic():
+                    job.save()
+                return job
+            except IntegrityError:
+                existing = Job.objects.filter(
+                    key=key, status__in=Job.ACTIVE
+                ).first()
+                # Иначе задача с этим ключом успела завершиться.
+                if existing is not None:
+                    return existing
+
+    def enqueue_on_commit(self, *args, **kwargs):
+        """Ставит задачу в очередь после фиксации текущей транзакции."""
+        transaction.on_commit(partial(self.enqueue, *args, **kwargs))
+
+
+def task(func=None, **options):
+    if func is None:
+        return partial(task, **options)
+    return Task(func, **options)
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(limit):
+    """Забирает до limit задач и скрывает их от других воркеров."""
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        # Выполняемая задача с истёкшим тайм-аутом — воркер пропал.
+        due = Job.objects.filter(
+            Q(status=Job.QUEUED) | Q(status=Job.RUNNING),
+            run_after__lte=now,
+        ).select_for_update(skip_locked=True)
+        for job in due[:limit]:
+            if job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.finished = now
+                job.last_error = job.last_error or 'Истёк тайм-аут'
+                job.save(update_fields=['status', 'finished', 'last_error'])
+                continue
+            updated = Job.objects.filter(
+                pk=job.pk, attempts=job.attempts
+            ).update(
+                status=Job.RUNNING,
+                attempts=job.attempts + 1,
+                run_after=now + timedelta(seconds=job.timeout),
+            )
+            if updated:
+                claimed.append((job.pk, job.attempts + 1))
+    return claimed
+
+
+def run(job_id, attempt):
+    """Выполняет забранную задачу и возвращает (id, успех)."""
+    try:
+        job = Job.objects.filter(pk=job_id).first()
+        if job is None:
+            # Задачу удалили, пока она ждала воркера.
+            return job_id, False
+        # Отчёт принимается, только если задачу не забрал другой воркер.
+        current = Job.objects.filter(pk=job_id, attempts=attempt)
+        try:
+            payload = json.loads(job.payload)
+            import_string(job.task)(*payload['args'], **payload['kwargs'])
+        except Exception as error:
+            failed = attempt >= job.max_attempts
+            current.update(
+                status=Job.FAILED if failed else Job.QUEUED,
+                run_after=timezone.now() + retry_delay(attempt),
+                last_error=f'{type(error).__name__}: {error}',
+                finished=timezone.now() if failed else None,
+            )
+            return job_id, False
+        current.update(status=Job.DONE, finished=timezone.now())
+        return job_id, True
+    finally:
+        close_old_connections()
@@ -0,0 +1,140 @@
+"""Очередь исходящих писем в базе.
+
+QueuedEmailBackend — EMAIL_BACKEND проекта: send_mail и письма
+django.contrib.auth (сброс пароля) не отправляются во время запроса,
+а сохраняются в QueuedEmail. Команда send_queued_mail забирает письма
+пачками и отправляет их через MAIL_QUEUE_DELIVERY_BACKEND по одному
+соединению; неудачные попытки повторяются с растущей задержкой.
+"""
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+# Сколько письмо считается занятым одним воркером, прежде чем его
+# сможет забрать другой.
+LEASE = timedelta(minutes=5)
+
+
+def enqueue(messages):
+    queued = []
+    for message in messages:
+        message.connection = None
+        queued.append(QueuedEmail(
+            subject=message.subject[:255],
+            recipients=', '.join(message.recipients()),
+            message=pickle.dumps(message),
+        ))
+    QueuedEmail.objects.bulk_create(queued)
+    return len(queued)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        messages = [
+            message for message in email_messages if message.recipients()
+        ]
+        return enqueue(messages) if messages else 0
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim(batch_size):
+    """Забирает письма, которым пора уйти, и продлевает им срок.
+
+    Как в core.jobs.claim: строки выбираются с skip_locked, а письмо
+    достаётся воркеру, только если прошёл его условный UPDATE по attempts.
+    """
+    now = timezone.now()
+    claimed = []
+    with transaction.atomic():
+        due = QueuedEmail.objects.filter(
+            status=QueuedEmail.PENDING, next_attempt__lte=now
+        )
+        # Срок последней попытки истёк без отчёта: воркер упал до
+        # отправки. Повторов больше не будет.
+        due.filter(
+            attempts__gte=settings.MAIL_QUEUE_MAX_ATTEMPTS
+        ).update(status=QueuedEmail.FAILED)
+        due = due.filter(
+            attempts__lt=settings.MAIL_QUEUE_MAX_ATTEMPTS
+        ).select_for_update(skip_locked=True)
+        for email in due[:batch_size]:
+            updated = QueuedEmail.objects.filter(
+                pk=email.pk, attempts=email.attempts
+            ).update(attempts=email.attempts + 1, next_attempt=now + LEASE)
+            if updated:
+                email.attempts += 1
+                email.next_attempt = now + LEASE
+                claimed.append(email)
+    return claimed
+
+
+def _fail(email, error):
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = QueuedEmail.FAILED
+    else:
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+
+
+def _report(email):
+    # Отчёт принимается, только если письмо не забрал другой
+    # воркер после истечения срока.
+    QueuedEmail.objects.filter(pk=email.pk, attempts=email.attempts).update(
+        status=email.status,
+        next_attempt=email.next_attempt,
+        sent=email.sent,
+        last_error=email.last_error,
+    )
+
+
+def deliver(emails):
+    """Отправляет забранные письма, возвращает (отправлено, ошибок)."""
+    sent = failed = 0
+    connection = get_connection(settings.MAIL_QUEUE_DELIVERY_BACKEND)
+    try:
+        try:
+            connection.open()
+        except Exception as error:
+            # Без соединения не ушло ни одно письмо: попытка неудачна для
+            # всей пачки, и письма повторяются с задержкой, как при ошибке
+            # отправки.
+            for email in emails:
+                _fail(email, error)
+                _report(email)
+            return sent, len(emails)
+        for email in emails:
+            try:
+                message = pickle.loads(email.message)
+                message.connection = connection
+                message.send()
+            except Exception as error:
+                failed += 1
+                _fail(email, error)
+            else:
+                sent += 1
+                email.status = QueuedEmail.SENT
+                email.sent = timezone.now()
+            _report(email)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def send_queued(batch_size=100):
+    """Отправляет одну пачку писем, возвращает (отправлено, ошибок)."""
+    emails = claim(batch_size)
+    if not emails:
+        return 0, 0
+    return deliver(emails)
@@ -0,0 +1,143 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from core.benchmark import (BENCHMARK_CACHES, compare, measure,
+                            route_params, routes, seed)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку всех страниц posts, users и about на тестовой '
+        'базе, гостем и авторизованным пользователем'
+    )
+
+    def add_arguments(self, parser):
+        dataset = parser.add_argument_group('данные')
+        dataset.add_argument('--users', type=int, default=20)
+        dataset.add_argument('--groups', type=int, default=5)
+        dataset.add_argument('--posts', type=int, default=200)
+        dataset.add_argument('--comments', type=int, default=500)
+        dataset.add_argument(
+            '--follows', type=int, default=5,
+            help='Подписок у каждого пользователя'
+        )
+        dataset.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=30,
+            help='Замеров каждой страницы в каждом режиме'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Запросов для прогрева перед замерами'
+        )
+        parser.add_argument('--output', help='Сохранить результаты в JSON')
+        parser.add_argument(
+            '--baseline', help='JSON с базовыми замерами для сравнения'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Записать результаты в --baseline вместо сравнения'
+        )
+        parser.add_argument(
+            '--metric', choices=('p50', 'p95', 'p99'), default='p50',
+            help='Перцентиль, по которому ищутся регрессии'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help='Допустимый относительный рост задержки'
+        )
+        parser.add_argument(
+            '--min-delta', type=float, default=5.0,
+            help='Рост задержки в мс, который не считается регрессией'
+        )
+
+    def handle(self, *args, **options):
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('--update-baseline требует --baseline')
+        dataset = {
+            key: options[key]
+            for key in ('users', 'groups', 'posts', 'comments', 'follows',
+                        'seed')
+        }
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                results = self.run(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        report = {'dataset': dataset, 'routes': results}
+        if options['output']:
+            self.save(options['output'], report)
+        if options['update_baseline']:
+            self.save(options['baseline'], report)
+            self.stdout.write(self.style.SUCCESS('Базовые замеры обновлены'))
+        elif options['baseline']:
+            self.check_baseline(results, options)
+
+    def run(self, dataset, options):
+        seed(
+            users=dataset['users'],
+            groups=dataset['groups'],
+            posts=dataset['posts'],
+            comments=dataset['comments'],
+            follows=dataset['follows'],
+            random_seed=dataset['seed'],
+        )
+        user, params = route_params()
+        guest = Client()
+        authorized = Client()
+        authorized.force_login(user)
+
+        def stay_logged_in():
+            # logout/ и смена пароля разлогинивают клиента.
+            if '_auth_user_id' not in authorized.session:
+                authorized.force_login(user)
+
+        self.stdout.write(
+            f'{"маршрут":<40}{"код":>5}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>6}{"байт":>9}'
+        )
+        results = {}
+        for name, url in routes(params):
+            for mode, client, after in (
+                ('guest', guest, None),
+                ('user', authorized, stay_logged_in),
+            ):
+                key = f'{mode} {name}'
+                stats = measure(
+                    client, url, options['requests'], options['warmup'],
+                    after_request=after
+                )
+                results[key] = stats
+                self.stdout.write(
+                    f'{key:<40}{stats["status"]:>5}{stats["p50"]:>9.1f}'
+                    f'{stats["p95"]:>9.1f}{stats["p99"]:>9.1f}'
+                    f'{stats["queries"]:>6}{stats["size"]:>9}'
+                )
+        return results
+
+    def save(self, path, report):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def check_baseline(self, results, options):
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(
+            results,
+            baseline['routes'],
+            threshold=options['threshold'],
+            min_delta=options['min_delta'],
+            metric=options['metric'],
+        )
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'Регрессий: {len(regressions)}')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test import override_settings
+
+from core.benchmark import BENCHMARK_CACHES, percentile, seed
+from posts.models import Comment, Post, User
+from posts.timeline import fan_out_post
+
+ENGINES = {
+    'tuned': ('core.db.backends.sqlite3', 'WAL'),
+    'plain': ('django.db.backends.sqlite3', 'DELETE'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет создание постов и комментариев в несколько потоков '
+        'одновременно с чтением ленты на тестовой базе SQLite в файле'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers', type=int, default=4,
+            help='Потоков, которые пишут посты и комментарии'
+        )
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Потоков, которые читают главную ленту'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Длительность замера каждого бэкенда, с'
+        )
+        parser.add_argument(
+            '--engine', choices=('tuned', 'plain', 'both'), default='both',
+            help='tuned — core.db.backends.sqlite3, plain — бэкенд Django'
+        )
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=200)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            directory, 'benchmark.sqlite3'
+        )
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            seed(
+                users=options['users'], posts=options['posts'], comments=0,
+                follows=3
+            )
+            engines = (
+                ENGINES if options['engine'] == 'both'
+                else [options['engine']]
+            )
+            self.stdout.write(
+                f'{"бэкенд":<8}{"запис/с":>9}{"p95, мс":>10}{"ошибок":>8}'
+                f'{"чтен/с":>9}{"p95, мс":>10}'
+            )
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                for name in engines:
+                    self.report(name, self.run(*ENGINES[name], options))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, engine, journal_mode, options):
+        database = settings.DATABASES['default']
+        default_engine = database['ENGINE']
+        # Потоки открывают свои соединения уже с этим бэкендом; режим
+        # журнала хранится в файле базы, его меняет основное соединение.
+        database['ENGINE'] = engine
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        self.users = list(User.objects.order_by('pk'))
+        self.deadline = time.perf_counter() + options['duration']
+        self.writes, self.reads, self.errors = [], [], []
+        threads = [
+            threading.Thread(target=self.worker, args=(self.write, number))
+            for number in range(options['writers'])
+        ] + [
+            threading.Thread(target=self.worker, args=(self.read,))
+            for _ in range(options['readers'])
+        ]
+        started = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            database['ENGINE'] = default_engine
+        return (
+            time.perf_counter() - started, self.writes, self.reads,
+            self.errors
+        )
+
+    def worker(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            connection.close()
+
+    def write(self, number):
+        user = self.users[number % len(self.users)]
+        while time.perf_counter() < self.deadline:
+            started = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    post = Post.objects.create(
+                        author=user, text=f'Пост из потока {number}'
+                    )
+                    fan_out_post(post)
+                    Comment.objects.create(
+                        post=post, author=user, text='Комментарий'
+                    )
+            except OperationalError:
+                self.errors.append(1)
+                continue
+            self.writes.append(time.perf_counter() - started)
+
+    def read(self):
+        while time.perf_counter() < self.deadline:
+            started = time.perf_counter()
+            list(Post.objects.select_related('author', 'group')[
+                :settings.POSTS_ON_PAGE
+            ])
+            self.reads.append(time.perf_counter() - started)
+
+    def report(self, name, result):
+        elapsed, writes, reads, errors = result
+
+        def p95(timings):
+            return percentile(timings, 95) * 1000 if timings else 0
+
+        self.stdout.write(
+            f'{name:<8}{len(writes) / elapsed:>9.1f}{p95(writes):>10.1f}'
+            f'{len(errors):>8}{len(reads) / elapsed:>9.1f}'
+            f'{p95(reads):>10.1f}'
+        )
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core.jobs import claim, run
+
+
+def init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков или процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='Сколько задач выполнять одновременно'
+        )
+        parser.add_argument(
+            '--pool', choices=('thread', 'process'), default='thread',
+            help='process — для задач, которые нагружают процессор'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза, с, когда очередь пуста'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершиться, когда очередь опустеет'
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if options['pool'] == 'process':
+            pool = ProcessPoolExecutor(concurrency, initializer=init_worker)
+        else:
+            pool = ThreadPoolExecutor(
+                concurrency, thread_name_prefix='jobs'
+            )
+        running = set()
+        with pool:
+            while True:
+                jobs = claim(concurrency - len(running))
+                if options['pool'] == 'process':
+                    # Соединения с базой нельзя наследовать в дочерних
+                    # процессах.
+                    connections.close_all()
+                else:
+                    close_old_connections()
+                running.update(
+                    pool.submit(run, job_id, attempt)
+                    for job_id, attempt in jobs
+                )
+                if not running:
+                    if options['burst']:
+                        return
+                    time.sleep(options['interval'])
+                    continue
+                done, running = wait(
+                    running, timeout=options['interval'],
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    job_id, ok = future.result()
+                    status = 'выполнена' if ok else 'ошибка'
+                    self.stdout.write(f'Задача {job_id}: {status}')
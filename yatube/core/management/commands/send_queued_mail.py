@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.mail import send_queued
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через '
+        'MAIL_QUEUE_DELIVERY_BACKEND'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Писем за одно соединение с почтовым сервером'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, проверять очередь каждые --interval с'
+        )
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = send_queued(options['batch_size'])
+            except Exception as error:
+                # Почтовый сервер недоступен: письма вернутся в очередь,
+                # когда истечёт их срок.
+                if not options['loop']:
+                    raise
+                self.stderr.write(f'Ошибка соединения: {error}')
+                sent = failed = 0
+            if sent or failed:
+                self.stdout.write(f'Отправлено: {sent}, ошибок: {failed}')
+            if not options['loop']:
+                return
+            close_old_connections()
+            if sent + failed < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts.feed_cache import GLOBAL_SCOPE, bump_feed_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики из REPLICA_DATABASES — '
+        'замена репликации для проверки роутера на двух файлах'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError(
+                'Реплик нет: задайте YATUBE_REPLICA_DB или REPLICA_DATABASES'
+            )
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            replica = connections[alias]
+            if replica.vendor != 'sqlite':
+                raise CommandError(f'{alias}: поддерживается только SQLite')
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: скопирована')
+        # Пока реплика отставала, ленты могли закэшироваться со старыми
+        # данными под новой версией.
+        bump_feed_version(GLOBAL_SCOPE)
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в новом процессе: загрузка приложения, как у сервера,
+# и запросы к нему по очереди через WSGI.
+CHILD = '''
+import json, sys, time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from yatube.wsgi import application
+
+booted = time.time()
+results = []
+for url in sys.argv[1:]:
+    environ = {'PATH_INFO': url, 'wsgi.input': BytesIO()}
+    setup_testing_defaults(environ)
+    statuses = []
+    started = time.time()
+    body = application(environ, lambda status, headers: statuses.append(
+        int(status.split()[0])))
+    for chunk in body:
+        if chunk:
+            break
+    first_byte = time.time()
+    for chunk in body:
+        pass
+    body.close()
+    results.append([url, statuses[0], started, first_byte])
+print(json.dumps({'booted': booted, 'requests': results}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает приложение в новом процессе и замеряет загрузку и время '
+        'до первого байта первых запросов, с прогревом и без'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', action='append', dest='urls',
+            help='Адрес для запроса, можно несколько (по умолчанию /)'
+        )
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help='Запусков процесса в каждом режиме, берётся медиана'
+        )
+        parser.add_argument(
+            '--mode', choices=('cold', 'warm', 'both'), default='both',
+            help='cold — без прогрева, warm — YATUBE_WARM_START=1'
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or ['/']
+        modes = (
+            ('cold', 'warm') if options['mode'] == 'both'
+            else (options['mode'],)
+        )
+        self.stdout.write(
+            f'{"режим":<6}{"адрес":<30}{"код":>5}{"загрузка":>10}'
+            f'{"до ответа":>11}{"ответ":>8}'
+        )
+        for mode in modes:
+            runs = [self.boot(mode, urls) for _ in range(options['runs'])]
+            for index, url in enumerate(urls):
+                status = runs[0]['requests'][index][1]
+                timings = [
+                    (run['booted'] - run['spawned'],
+                     run['requests'][index][3] - run['spawned'],
+                     run['requests'][index][3] - run['requests'][index][2])
+                    for run in runs
+                ]
+                boot, total, response = (
+                    median(column) * 1000 for column in zip(*timings)
+                )
+                self.stdout.write(
+                    f'{mode:<6}{url:<30}{status:>5}{boot:>10.0f}'
+                    f'{total:>11.0f}{response:>8.1f}'
+                )
+
+    def boot(self, mode, urls):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'yatube.settings'
+            ),
+            'YATUBE_WARM_START': '1' if mode == 'warm' else '0',
+        }
+        spawned = time.time()
+        process = subprocess.run(
+            [sys.executable, '-c', CHILD, *urls],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if process.returncode:
+            raise CommandError(process.stderr.strip().splitlines()[-1])
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        result['spawned'] = spawned
+        return result
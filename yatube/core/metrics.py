@@ -0,0 +1,216 @@
+"""Метрики в текстовом формате Prometheus для нескольких процессов.
+
+Каждый процесс пишет значения в свой файл METRICS_DIR/<pid>.db,
+отображённый в память; /metrics суммирует файлы всех процессов.
+Файлы завершившихся процессов остаются, чтобы счётчики не убывали, —
+каталог очищают при деплое.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+HEADER = struct.Struct('<ii')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 64 * 1024
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+REGISTRY = {}
+
+
+def _entries(data, used):
+    """Возвращает тройки (ключ, значение, смещение значения)."""
+    position = HEADER.size
+    while position < used:
+        (length,) = struct.unpack_from('<i', data, position)
+        key_end = position + 4 + length
+        key = bytes(data[position + 4:key_end]).decode()
+        offset = key_end + 8 - (length + 4) % 8
+        yield key, VALUE.unpack_from(data, offset)[0], offset
+        position = offset + VALUE.size
+
+
+class FileStore:
+    """Значения метрик одного процесса в файле, отображённом в память."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self.fd).st_size
+        if size < INITIAL_SIZE:
+            os.ftruncate(self.fd, INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self.mmap = mmap.mmap(self.fd, size)
+        self.used = HEADER.unpack_from(self.mmap)[0] or HEADER.size
+        self.positions = {
+            key: offset for key, _, offset in _entries(self.mmap, self.used)
+        }
+
+    def _add(self, key):
+        encoded = key.encode()
+        padding = 8 - (len(encoded) + 4) % 8
+        entry = struct.pack(
+            f'<i{len(encoded)}s{padding}xd', len(encoded), encoded, 0.0
+        )
+        if self.used + len(entry) > len(self.mmap):
+            self.mmap.close()
+            os.ftruncate(self.fd, 2 * os.fstat(self.fd).st_size)
+            self.mmap = mmap.mmap(self.fd, os.fstat(self.fd).st_size)
+        self.mmap[self.used:self.used + len(entry)] = entry
+        offset = self.used + len(entry) - VALUE.size
+        self.used += len(entry)
+        # Длина записывается последней: читатели видят только целые записи.
+        HEADER.pack_into(self.mmap, 0, self.used, 0)
+        self.positions[key] = offset
+        return offset
+
+    def inc(self, amounts):
+        with self.lock:
+            for key, amount in amounts:
+                offset = self.positions.get(key)
+                if offset is None:
+                    offset = self._add(key)
+                value = VALUE.unpack_from(self.mmap, offset)[0]
+                VALUE.pack_into(self.mmap, offset, value + amount)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    directory = settings.METRICS_DIR
+    store = _store
+    # После fork у дочернего процесса должен быть свой файл.
+    if (store is None or store.pid != os.getpid()
+            or os.path.dirname(store.path) != directory):
+        with _store_lock:
+            os.makedirs(directory, exist_ok=True)
+            store = _store = FileStore(
+                os.path.join(directory, f'{os.getpid()}.db')
+            )
+    return store
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def _key(self, suffix, labels, *extra):
+        pairs = [[name, str(labels[name])] for name in self.labelnames]
+        return json.dumps([self.name, suffix, pairs + list(extra)])
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        get_store().inc([(self._key('', labels), amount)])
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Пустые бакеты тоже записываются: набор le не зависит от данных.
+        amounts = [
+            (self._key('_bucket', labels, ['le', repr(float(bound))]),
+             int(value <= bound))
+            for bound in self.buckets
+        ]
+        amounts += [
+            (self._key('_bucket', labels, ['le', '+Inf']), 1),
+            (self._key('_sum', labels), value),
+            (self._key('_count', labels), 1),
+        ]
+        get_store().inc(amounts)
+
+
+def _escape(value):
+    return (value.replace('\\', r'\\').replace('\n', r'\n')
+            .replace('"', r'\"'))
+
+
+def _order(sample):
+    name, suffix, pairs = sample
+    labels = [pair for pair in pairs if pair[0] != 'le']
+    bound = [float(pair[1]) for pair in pairs if pair[0] == 'le']
+    rank = ('_bucket', '_sum', '_count').index(suffix) if suffix else 0
+    return name, labels, rank, bound[0] if bound else -math.inf
+
+
+def collect(directory=None):
+    """Суммирует файлы всех процессов и возвращает текст для /metrics."""
+    directory = directory or settings.METRICS_DIR
+    totals = defaultdict(float)
+    if os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if not filename.endswith('.db'):
+                continue
+            with open(os.path.join(directory, filename), 'rb') as file:
+                data = file.read()
+            if len(data) < HEADER.size:
+                continue
+            used = HEADER.unpack_from(data)[0]
+            for key, value, _ in _entries(data, used):
+                totals[key] += value
+    samples = defaultdict(list)
+    for key, value in totals.items():
+        name, suffix, pairs = json.loads(key)
+        samples[name].append(((name, suffix, pairs), value))
+    lines = []
+    for name in sorted(samples):
+        metric = REGISTRY.get(name)
+        if metric is not None:
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+        for (_, suffix, pairs), value in sorted(
+            samples[name], key=lambda item: _order(item[0])
+        ):
+            labels = ','.join(
+                f'{label}="{_escape(text)}"' for label, text in pairs
+            )
+            labels = f'{{{labels}}}' if labels else ''
+            lines.append(f'{name}{suffix}{labels} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_LATENCY = Histogram(
+    'yatube_http_request_duration_seconds',
+    'Время ответа по имени view.',
+    ['view'],
+)
+DB_QUERIES = Counter(
+    'yatube_db_queries_total',
+    'SQL-запросы по имени view.',
+    ['view'],
+)
+FRAGMENT_CACHE = Counter(
+    'yatube_fragment_cache_total',
+    'Обращения к кэшу фрагментов шаблонов.',
+    ['fragment', 'result'],
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Время создания миниатюр изображения.',
+    ['result'],
+)
@@ -0,0 +1,159 @@
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .db import routers
+from .metrics import DB_QUERIES, REQUEST_LATENCY
+
+logger = logging.getLogger('yatube.timing')
+
+_local = threading.local()
+
+
+class RequestTimings:
+    """Счётчики одного запроса: SQL и рендеринг шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def current_timings():
+    """Счётчики текущего запроса, если он попал в выборку, иначе None."""
+    return getattr(_local, 'timings', None)
+
+
+class ServerTimingMiddleware:
+    """Отдаёт время SQL, шаблонов и view в заголовке Server-Timing.
+
+    Замеряется доля SERVER_TIMING_SAMPLE_RATE запросов; остальные
+    проходят без обёрток, с одним вызовом random(). Время шаблонов
+    считает бэкенд core.template.backends.timed.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings = _local.timings = RequestTimings()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+        finished = time.perf_counter()
+        view_started = getattr(request, '_view_started', started)
+        metrics = {
+            'db': timings.db * 1000,
+            'tpl': timings.templates * 1000,
+            'view': (finished - view_started) * 1000,
+            'total': (finished - started) * 1000,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={value:.1f}' for name, value in metrics.items()
+        ) + f', sql;desc="{timings.queries} queries"'
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timings.queries,
+            **{f'{name}_ms': round(value, 1)
+               for name, value in metrics.items()},
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if current_timings() is not None:
+            request._view_started = time.perf_counter()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Время ответа и число SQL-запросов по имени view для /metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, view=view)
+        if counter.queries:
+            DB_QUERIES.inc(counter.queries, view=view)
+        return response
+
+
+class ReplicaMiddleware:
+    """Страницы posts читаются с реплик, кроме клиентов, которые писали.
+
+    После запроса с записью в базу cookie REPLICA_STICKY_COOKIE на
+    REPLICA_STICKY_SECONDS оставляет клиента на основной базе: свои посты,
+    комментарии и подписки он видит сразу, не дожидаясь реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+            wrote = routers.wrote()
+        finally:
+            routers.reset()
+        if wrote:
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.REPLICA_STICKY_COOKIE,
+                str(int(time.time() + window)),
+                max_age=window,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or not view_func.__module__.startswith('posts.')
+                or self.sticky(request)):
+            return
+        routers.allow_replica()
+
+    def sticky(self, request):
+        value = request.COOKIES.get(settings.REPLICA_STICKY_COOKIE, '')
+        return value.isdigit() and int(value) > time.time()
@@ -0,0 +1,22 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='key',
+            field=models.CharField(blank=True, help_text='Уникален среди задач в очереди и выполняемых', max_length=200, null=True, verbose_name='Ключ идемпотентности'),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(status__in=('queued', 'running')), fields=('key',), name='job_unique_active_key'),
+        ),
+    ]
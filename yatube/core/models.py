@@ -0,0 +1,146 @@
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    recipients = models.TextField(verbose_name='Получатели')
+    message = models.BinaryField(
+        verbose_name='Письмо',
+        help_text='EmailMessage, сериализованный pickle'
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Поставлено в очередь',
+        auto_now_add=True
+    )
+    sent = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='queued_email_due_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.subject} → {self.recipients}'
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+    ACTIVE = (QUEUED, RUNNING)
+
+    task = models.CharField(
+        verbose_name='Задача',
+        max_length=200,
+        help_text='Путь к функции, объявленной через core.jobs.task'
+    )
+    payload = models.TextField(
+        verbose_name='Аргументы',
+        help_text='JSON: {"args": [...], "kwargs": {...}}'
+    )
+    priority = models.SmallIntegerField(
+        verbose_name='Приоритет',
+        default=0,
+        help_text='Задачи с большим приоритетом выполняются раньше'
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=QUEUED
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    max_attempts = models.PositiveIntegerField(verbose_name='Всего попыток')
+    timeout = models.PositiveIntegerField(
+        verbose_name='Тайм-аут видимости, с',
+        help_text='Через столько секунд задачу заберёт другой воркер, '
+                  'если этот не отчитался'
+    )
+    run_after = models.DateTimeField(
+        verbose_name='Не раньше',
+        default=timezone.now,
+        help_text='Для выполняемой задачи — конец тайм-аута видимости'
+    )
+    key = models.CharField(
+        verbose_name='Ключ идемпотентности',
+        max_length=200,
+        null=True,
+        blank=True,
+        help_text='Уникален среди задач в очереди и выполняемых'
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Поставлена в очередь',
+        auto_now_add=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Завершена',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ('-priority', 'run_after', 'id')
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_after'],
+                name='job_due_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=('queued', 'running')),
+                name='job_unique_active_key'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,40 @@
+"""Бэкенд шаблонов, который считает время рендеринга для Server-Timing.
+
+Время замеряется только у запросов из выборки ServerTimingMiddleware;
+остальные шаблоны рендерятся как в DjangoTemplates.
+"""
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+from core.middleware import current_timings
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = current_timings()
+        if timings is None:
+            return super().render(context, request)
+        # Шаблон, отрендеренный внутри другого, уже входит в его время.
+        timings.depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.depth -= 1
+            if not timings.depth:
+                timings.templates += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
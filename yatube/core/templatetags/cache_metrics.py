@@ -0,0 +1,48 @@
+from django import template
+from django.template import NodeList
+from django.templatetags.cache import CacheNode, do_cache
+
+from core.metrics import FRAGMENT_CACHE
+
+register = template.Library()
+
+
+class RenderedNodeList(NodeList):
+    """Отмечает в render_context, что фрагмент пришлось отрендерить."""
+
+    def __init__(self, nodelist, marker):
+        super().__init__(nodelist)
+        self.contains_nontext = nodelist.contains_nontext
+        self.marker = marker
+
+    def render(self, context):
+        context.render_context[self.marker] = True
+        return super().render(context)
+
+
+class MeteredCacheNode(CacheNode):
+    def __init__(self, nodelist, *args):
+        self.marker = object()
+        super().__init__(RenderedNodeList(nodelist, self.marker), *args)
+
+    def render(self, context):
+        context.render_context[self.marker] = False
+        value = super().render(context)
+        FRAGMENT_CACHE.inc(
+            fragment=self.fragment_name,
+            result='miss' if context.render_context[self.marker] else 'hit',
+        )
+        return value
+
+
+@register.tag('cache')
+def do_metered_cache(parser, token):
+    """{% cache %}, который считает попадания в кэш фрагментов."""
+    node = do_cache(parser, token)
+    return MeteredCacheNode(
+        node.nodelist,
+        node.expire_time_var,
+        node.fragment_name,
+        node.vary_on,
+        node.cache_name,
+    )
@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты без выборочных замеров Server-Timing.
+
+    Иначе случайная доля запросов пишет в консоль строки yatube.timing,
+    и вывод тестов меняется от запуска к запуску. Тесты замеров включают
+    выборку через override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.sampling = override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+        self.sampling.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.sampling.disable()
+        super().teardown_test_environment(**kwargs)
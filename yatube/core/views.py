@@ -1,4 +1,17 @@
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.views.static import serve
+
+from .metrics import collect
+
+# Файлы, содержимое которых по этому адресу никогда не меняется: имена
+# из хэша содержимого (posts.storage) и миниатюры sorl-thumbnail.
+IMMUTABLE_MEDIA = re.compile(
+    r'^(?:[\w-]+/[0-9a-f]{2}/[0-9a-f]{64}\.\w+|cache/.+)$'
+)
 
 
 def page_not_found(request, exception):
@@ -15,3 +28,22 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    allowed = settings.METRICS_ALLOWED_IPS
+    if allowed and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        collect(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def media(request, path):
+    """Отдаёт MEDIA_ROOT; неизменяемые файлы кэшируются навсегда."""
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if IMMUTABLE_MEDIA.match(path):
+        response['Cache-Control'] = (
+            f'public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable'
+        )
+    return response
@@ -0,0 +1,98 @@
+"""Прогрев процесса до приёма запросов.
+
+warm_up() вызывается из yatube/wsgi.py и yatube/asgi.py при WARM_START:
+шаблоны компилируются в кэш загрузчика, URL-резолвер строится целиком
+(вместе с ним импортируются все view), загружается перевод. Серверы,
+которые делают fork после загрузки приложения (gunicorn --preload),
+получают всё это в каждом воркере без повторной работы. Соединения
+с базой здесь не открываются: их нельзя делить между процессами.
+"""
+import logging
+import os
+import time
+from importlib import import_module
+from importlib.util import find_spec
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger('yatube.warmup')
+
+
+def template_names(directories):
+    """Имена всех шаблонов в каталогах относительно этих каталогов."""
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(('.html', '.txt', '.xml')):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    )
+
+
+def compile_templates():
+    """Компилирует шаблоны проекта и приложений, возвращает число и ошибки.
+
+    С кэширующим загрузчиком скомпилированные шаблоны остаются в памяти.
+    """
+    compiled, errors = 0, []
+    for engine in engines.all():
+        directories = list(engine.dirs) + list(
+            get_app_template_dirs('templates')
+        )
+        for name in sorted(set(template_names(directories))):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError as error:
+                errors.append(f'{name}: {error}')
+            else:
+                compiled += 1
+    return compiled, errors
+
+
+def populate_urls(resolver=None):
+    """Строит резолвер и вложенные резолверы, возвращает число маршрутов."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += populate_urls(pattern)
+        else:
+            count += 1
+    return count
+
+
+def import_views():
+    """Импортирует модули views установленных приложений."""
+    count = 0
+    for app in apps.get_app_configs():
+        name = f'{app.name}.views'
+        if find_spec(name) is not None:
+            import_module(name)
+            count += 1
+    return count
+
+
+def warm_up():
+    started = time.perf_counter()
+    translation.activate(settings.LANGUAGE_CODE)
+    try:
+        templates, errors = compile_templates()
+        urls = populate_urls()
+        views = import_views()
+    finally:
+        translation.deactivate()
+    for error in errors:
+        logger.warning('Шаблон не скомпилирован: %s', error)
+    logger.info(
+        'Прогрев за %.0f мс: шаблонов %d, маршрутов %d, модулей view %d',
+        (time.perf_counter() - started) * 1000, templates, urls, views
+    )
+    return {'templates': templates, 'errors': errors, 'urls': urls,
+            'views': views}
@@ -0,0 +1,189 @@
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from .etags import (follow_etag, group_posts_etag, index_etag,
+                    post_detail_etag, profile_etag)
+from .models import Comment, Group, Post, User
+from .utils import CursorPaginator
+
+# Имя поля в ответе -> путь для values(); выбираются только запрошенные.
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(request, available):
+    raw = request.GET.get('fields')
+    if raw is None:
+        return dict(available)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if not names or unknown:
+        raise InvalidFields(
+            'Неизвестные поля: {}. Доступны: {}.'.format(
+                ', '.join(unknown) or raw, ', '.join(available)
+            )
+        )
+    return {name: available[name] for name in dict.fromkeys(names)}
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def _serialize(row, fields):
+    data = {name: row[path] for name, path in fields.items()}
+    if 'image' in data:
+        data['image'] = (
+            default_storage.url(data['image']) if data['image'] else None
+        )
+    return data
+
+
+def _link(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'?{params.urlencode()}')
+
+
+def _stream(request, page, fields):
+    yield '{"results": ['
+    for number, row in enumerate(page):
+        if number:
+            yield ', '
+        yield _dumps(_serialize(row, fields))
+    yield '], "next": {}, "previous": {}}}'.format(
+        _dumps(_link(request, page.next_cursor)),
+        _dumps(_link(request, page.previous_cursor)),
+    )
+
+
+def _error(detail, status):
+    return JsonResponse(
+        {'detail': detail},
+        status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def _not_found():
+    return _error('Не найдено.', 404)
+
+
+def _feed(request, queryset, available=POST_FIELDS, date_field='pub_date',
+          per_page=None):
+    try:
+        fields = parse_fields(request, available)
+    except InvalidFields as error:
+        return _error(str(error), 400)
+    columns = dict.fromkeys((*fields.values(), date_field, 'id'))
+    paginator = CursorPaginator(
+        queryset.values(*columns),
+        per_page or settings.POSTS_ON_PAGE,
+        date_field=date_field,
+        pk_field='id',
+    )
+    # Страница читается до ответа: ReplicaMiddleware сбрасывает выбор
+    # базы, как только view вернул ответ, и запрос из потока ушёл бы
+    # в основную базу.
+    page = paginator.get_page(request.GET.get('cursor')).load()
+    return StreamingHttpResponse(
+        _stream(request, page, fields), content_type='application/json'
+    )
+
+
+@require_GET
+@condition(etag_func=partial(index_etag, comments=True))
+def index(request):
+    return _feed(request, Post.objects.all())
+
+
+@require_GET
+@condition(etag_func=partial(group_posts_etag, comments=True))
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return _not_found()
+    return _feed(request, Post.objects.filter(group_id=group_id))
+
+
+@require_GET
+@condition(etag_func=partial(profile_etag, comments=True))
+def profile(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if author_id is None:
+        return _not_found()
+    return _feed(request, Post.objects.filter(author_id=author_id))
+
+
+@require_GET
+@condition(etag_func=partial(follow_etag, comments=True))
+def follow_index(request):
+    if not request.user.is_authenticated:
+        return _error('Требуется авторизация.', 401)
+    return _feed(
+        request, Post.objects.filter(timeline_entries__user=request.user)
+    )
+
+
+@require_GET
+@condition(etag_func=post_detail_etag)
+def post_detail(request, post_id):
+    try:
+        fields = parse_fields(request, POST_FIELDS)
+    except InvalidFields as error:
+        return _error(str(error), 400)
+    row = Post.objects.filter(pk=post_id).values(
+        *dict.fromkeys(fields.values())
+    ).first()
+    if row is None:
+        return _not_found()
+    return JsonResponse(
+        _serialize(row, fields),
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@require_GET
+@condition(etag_func=post_detail_etag)
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return _not_found()
+    return _feed(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        available=COMMENT_FIELDS,
+        date_field='created',
+        per_page=settings.COMMENTS_ON_PAGE,
+    )
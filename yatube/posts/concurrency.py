@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+
+@lru_cache(maxsize=None)
+def _executor(workers):
+    return ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='feed-queries'
+    )
+
+
+def _run(func):
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+def gather(*funcs):
+    """Выполняет независимые запросы одновременно и возвращает их результаты.
+
+    Первый запрос выполняется в текущем потоке, остальные — в пуле, каждый
+    в своём соединении. Внутри транзакции другие соединения не видят её
+    изменений, поэтому там запросы выполняются по очереди.
+    """
+    if (settings.FEED_QUERY_WORKERS < 2 or len(funcs) < 2
+            or connection.in_atomic_block):
+        return [func() for func in funcs]
+    first, *rest = funcs
+    executor = _executor(settings.FEED_QUERY_WORKERS)
+    futures = [executor.submit(_run, func) for func in rest]
+    results = [first()]
+    results.extend(future.result() for future in futures)
+    return results
@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import task
+
+from .models import Comment, Follow, Group, MediaFile, Post, User, UserStats
+from .storage import post_images
+
+
+def change_counter(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_user_counter(user_id, field, delta):
+    stats = UserStats.objects.filter(user_id=user_id)
+    if not change_counter(stats, field, delta) and delta > 0:
+        UserStats.objects.get_or_create(user_id=user_id)
+        change_counter(stats, field, delta)
+
+
+def change_group_counter(group_id, delta):
+    if group_id is not None:
+        change_counter(Group.objects.filter(pk=group_id), 'posts_count', delta)
+
+
+def change_comments_counter(post_id, delta):
+    change_counter(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def change_image_refs(name, delta):
+    """Меняет число постов с файлом name и удаляет файл без ссылок."""
+    if not name:
+        return
+    files = MediaFile.objects.filter(name=name)
+    if not change_counter(files, 'refs', delta) and delta > 0:
+        MediaFile.objects.get_or_create(name=name)
+        change_counter(files, 'refs', delta)
+    if delta < 0 and files.filter(refs=0).exists():
+        delete_unused_image.enqueue_on_commit(name)
+
+
+@task
+def delete_unused_image(name):
+    """Удаляет файл и его миниатюры, если на него больше нет ссылок."""
+    # Post.save проверяет файл и увеличивает refs в одной транзакции:
+    # загрузка того же файла либо ждёт удаления и пишет файл заново,
+    # либо успевает раньше, и строка с refs=0 уже не найдётся.
+    with transaction.atomic():
+        deleted, _ = MediaFile.objects.filter(name=name, refs=0).delete()
+        if deleted:
+            default.backend.delete(ImageFile(name, post_images))
+
+
+def _count(model, field, target='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef(target)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), Value(0))
+
+
+def _reconcile(queryset, field, actual):
+    drifted = queryset.annotate(actual=actual).exclude(**{field: F('actual')})
+    return queryset.filter(pk__in=drifted.values('pk')).update(
+        **{field: actual}
+    )
+
+
+def reconcile_counters():
+    """Пересчитывает все счётчики и возвращает число исправленных строк."""
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=user_id) for user_id in User.objects.filter(
+            stats__isnull=True
+        ).values_list('pk', flat=True)),
+        ignore_conflicts=True
+    )
+    MediaFile.objects.bulk_create(
+        (MediaFile(name=name) for name in Post.objects.exclude(
+            image=''
+        ).values_list('image', flat=True).distinct()),
+        ignore_conflicts=True
+    )
+    stats = UserStats.objects.all()
+    return {
+        'MediaFile.refs': _reconcile(
+            MediaFile.objects.all(), 'refs', _count(Post, 'image', 'name')
+        ),
+        'Post.comments_count': _reconcile(
+            Post.objects.all(), 'comments_count', _count(Comment, 'post')
+        ),
+        'Group.posts_count': _reconcile(
+            Group.objects.all(), 'posts_count', _count(Post, 'group')
+        ),
+        'UserStats.posts_count': _reconcile(
+            stats, 'posts_count', _count(Post, 'author')
+        ),
+        'UserStats.followers_count': _reconcile(
+            stats, 'followers_count', _count(Follow, 'author')
+        ),
+        'UserStats.following_count': _reconcile(
+            stats, 'following_count', _count(Follow, 'user')
+        ),
+    }
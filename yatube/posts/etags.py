@@ -0,0 +1,85 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .feed_cache import (comments_scope, feed_version, group_scope,
+                         profile_scope)
+from .models import Follow, Group, Post, Timeline, User
+
+
+def _etag(request, *parts):
+    user = request.user
+    if user.is_authenticated:
+        parts += (
+            user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        )
+    parts += (
+        request.GET.get('page', ''),
+        request.GET.get('cursor', ''),
+        request.GET.get('fields', ''),
+    )
+    return md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _versions(scope, comments):
+    versions = (feed_version(scope),)
+    if comments:
+        versions += (feed_version(comments_scope(scope)),)
+    return versions
+
+
+def index_etag(request, comments=False):
+    return _etag(request, *_versions('index', comments))
+
+
+def group_posts_etag(request, slug, comments=False):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    if group_id is None:
+        return None
+    return _etag(request, *_versions(group_scope(group_id), comments))
+
+
+def profile_etag(request, username, comments=False):
+    author = User.objects.filter(username=username).values_list(
+        'pk',
+        'stats__posts_count',
+        'stats__followers_count',
+        'stats__following_count',
+    ).first()
+    if author is None:
+        return None
+    following = (request.user.is_authenticated
+                 and Follow.objects.filter(
+                     user=request.user, author_id=author[0]).exists())
+    return _etag(
+        request,
+        *_versions(profile_scope(author[0]), comments),
+        following,
+        *author
+    )
+
+
+def post_detail_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).order_by().values_list(
+        'author_id', 'comments_count'
+    ).annotate(last_comment=Max('comments__pk')).first()
+    if post is None:
+        return None
+    return _etag(request, feed_version(profile_scope(post[0])), *post)
+
+
+def follow_etag(request, comments=False):
+    if not request.user.is_authenticated:
+        return None
+    timeline = Timeline.objects.filter(user=request.user).aggregate(
+        entries=Count('pk'), last_entry=Max('pk')
+    )
+    return _etag(
+        request,
+        *_versions('index', comments),
+        timeline['entries'],
+        timeline['last_entry'],
+    )
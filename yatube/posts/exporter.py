@@ -0,0 +1,75 @@
+import csv
+import json
+from datetime import datetime
+
+from .models import Comment, Post
+
+CHUNK_SIZE: int = 2000
+FORMATS = ('ndjson', 'csv')
+# Колонки совпадают с форматом import_data: выгрузку можно загрузить
+# обратно, авторы и группы указаны по username и slug.
+COLUMNS = {
+    'posts': {
+        'id': 'id',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'title': 'title',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'image': 'image',
+    },
+    'comments': {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+}
+MODELS = {'posts': Post, 'comments': Comment}
+
+
+def export_rows(kind, chunk_size=CHUNK_SIZE, **lookup):
+    """Читает посты или комментарии к ним курсором, по chunk_size строк."""
+    columns = COLUMNS[kind]
+    if kind == 'comments':
+        lookup = {f'post__{key}': value for key, value in lookup.items()}
+    rows = MODELS[kind].objects.filter(**lookup).order_by('pk').values_list(
+        *columns.values()
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in zip(columns, row)
+        }
+
+
+class Echo:
+    """Буфер для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _lines(kind, format, rows):
+    if format == 'csv':
+        writer = csv.DictWriter(Echo(), fieldnames=list(COLUMNS[kind]))
+        yield writer.writeheader()
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def export_stream(kind, format, chunk_size=CHUNK_SIZE, **lookup):
+    """Отдаёт выгрузку кусками примерно по chunk_size строк."""
+    buffer = []
+    rows = export_rows(kind, chunk_size, **lookup)
+    for line in _lines(kind, format, rows):
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
@@ -0,0 +1,67 @@
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+VERSION_KEY = 'posts:feed_version:{}'
+GLOBAL_SCOPE = 'all'
+
+
+def _initial_version():
+    # Если ключ версии вытеснен из кэша, новая версия не совпадёт
+    # ни с одной из прежних.
+    return int(time.time() * 1000)
+
+
+def feed_version(scope):
+    keys = [VERSION_KEY.format(GLOBAL_SCOPE), VERSION_KEY.format(scope)]
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, settings.FEED_VERSION_TIMEOUT)
+        versions.update(missing)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def _bump(scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(
+                key, _initial_version(), settings.FEED_VERSION_TIMEOUT
+            )
+
+
+def bump_feed_version(*scopes):
+    _bump(scopes)
+    # До фиксации транзакции другие запросы ещё видят старые данные и могут
+    # закэшировать их под новой версией.
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(_bump, scopes))
+
+
+def feed_cache(request, scope):
+    """Параметры {% cache %} для ленты: страница и версия содержимого."""
+    page = request.GET.get('page', '')
+    cursor = request.GET.get('cursor', '')
+    return {
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+        'key': f'{scope}:{page}:{cursor}:{feed_version(scope)}',
+    }
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def profile_scope(user_id):
+    return f'profile:{user_id}'
+
+
+def comments_scope(scope):
+    """Версия счётчиков комментариев ленты: они есть только в API."""
+    return f'comments:{scope}'
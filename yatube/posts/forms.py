@@ -1,6 +1,9 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import normalize_image
 from .models import Post, Comment
+from .thumbnails import schedule_thumbnails
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +11,18 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('title', 'group', 'text', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return normalize_image(image)
+        return image
+
+    def save(self, commit=True):
+        post = super().save(commit)
+        if commit and post.image and 'image' in self.changed_data:
+            schedule_thumbnails(post.image.name)
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
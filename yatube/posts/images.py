@@ -0,0 +1,79 @@
+import os
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageCms, ImageOps
+
+SRGB = ImageCms.createProfile('sRGB')
+
+
+def to_srgb(image, icc_profile):
+    """Переводит изображение в RGB(A), цвета — через профиль ICC в sRGB.
+
+    Результат сохраняется без профиля: sRGB подразумевается по умолчанию.
+    """
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    mode = 'RGBA' if has_alpha else 'RGB'
+    if icc_profile:
+        try:
+            return ImageCms.profileToProfile(
+                image,
+                ImageCms.ImageCmsProfile(BytesIO(icc_profile)),
+                SRGB,
+                outputMode=mode,
+            )
+        except (ImageCms.PyCMSError, OSError):
+            # Повреждённый профиль или профиль не того цветового
+            # пространства: цвета переводятся без него.
+            pass
+    if image.mode != mode:
+        image = image.convert(mode)
+    return image
+
+
+def normalize_image(uploaded):
+    """Уменьшает изображение, убирает метаданные и перекодирует его.
+
+    Файл читается с диска или из памяти потоком, для JPEG декодирование
+    сразу идёт в уменьшенном масштабе (draft), а результат пишется во
+    временный файл, который уходит на диск при превышении
+    FILE_UPLOAD_MAX_MEMORY_SIZE.
+    """
+    max_size = settings.POST_IMAGE_MAX_SIZE
+    uploaded.seek(0)
+    try:
+        with Image.open(uploaded) as image:
+            width, height = image.size
+            if width * height > settings.POST_IMAGE_MAX_PIXELS:
+                raise ValidationError(
+                    'Изображение слишком большое: %(width)s×%(height)s',
+                    code='image_too_large',
+                    params={'width': width, 'height': height},
+                )
+            image.draft('RGB', (max_size, max_size))
+            icc_profile = image.info.get('icc_profile')
+            image = to_srgb(ImageOps.exif_transpose(image), icc_profile)
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            output = SpooledTemporaryFile(
+                max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            )
+            image.save(
+                output,
+                settings.POST_IMAGE_FORMAT,
+                quality=settings.POST_IMAGE_QUALITY,
+            )
+    except Image.DecompressionBombError:
+        raise ValidationError(
+            'Изображение слишком большое', code='image_too_large'
+        )
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError(
+            'Не удалось прочитать изображение', code='invalid_image'
+        )
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(uploaded.name))[0]
+    extension = settings.POST_IMAGE_FORMAT.lower()
+    return File(output, name=f'{name}.{extension}')
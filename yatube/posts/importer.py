@@ -0,0 +1,236 @@
+import csv
+import json
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .counters import reconcile_counters
+from .feed_cache import GLOBAL_SCOPE, bump_feed_version
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .timeline import rebuild_timeline
+
+BATCH_SIZE: int = 1000
+# Порядок, в котором записи ссылаются друг на друга.
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+MODELS = {
+    'users': User,
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+# Существующие записи можно указывать по естественному ключу.
+NATURAL_KEYS = {'users': 'username', 'groups': 'slug'}
+# Ограничение SQLite на число параметров запроса.
+CHUNK_SIZE: int = 500
+
+
+class ImportFailed(ValueError):
+    pass
+
+
+def read_records(stream, format):
+    """Построчно читает NDJSON или CSV, не загружая файл в память."""
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise ImportFailed(f'Строка {number}: {error}')
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+class Importer:
+    """Загружает записи пачками через bulk_create.
+
+    Первичные ключи назначаются заранее, поэтому внешние ключи следующих
+    файлов разрешаются по словарю «id из файла -> pk» без запросов к базе.
+    В памяти держится только текущая пачка и этот словарь.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.ids = {kind: {} for kind in ('users', 'groups', 'posts')}
+        self.next_pk = {}
+        self.authors = set()
+        self.followers = set()
+        self.now = timezone.now()
+
+    def run(self, kind, records, progress=None):
+        build = getattr(self, f'build_{kind}')
+        model = MODELS[kind]
+        total = 0
+        with keep_dates(
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        ):
+            for batch in batches(records, self.batch_size):
+                objects = []
+                for record in batch:
+                    try:
+                        objects.append(build(record))
+                    except KeyError as error:
+                        raise ImportFailed(
+                            f'{kind}, запись {total + len(objects) + 1}: '
+                            f'нет поля {error}'
+                        )
+                    except ValueError as error:
+                        raise ImportFailed(
+                            f'{kind}, запись {total + len(objects) + 1}: '
+                            f'{error}'
+                        )
+                # Размер отдельных INSERT выбирает бэкенд: у SQLite
+                # есть предел на число строк в одном запросе.
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objects, ignore_conflicts=model is Follow
+                    )
+                    if model is User:
+                        UserStats.objects.bulk_create(
+                            (UserStats(user_id=user.pk) for user in objects),
+                            ignore_conflicts=True
+                        )
+                total += len(objects)
+                if progress is not None:
+                    progress(kind, total)
+        return total
+
+    def finish(self):
+        """Восстанавливает то, что bulk_create делает без сигналов."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), [MODELS[kind] for kind in KINDS]
+            ):
+                cursor.execute(sql)
+        fixed = reconcile_counters()
+        followers = set(self.followers)
+        authors = list(self.authors)
+        for start in range(0, len(authors), CHUNK_SIZE):
+            followers.update(Follow.objects.filter(
+                author_id__in=authors[start:start + CHUNK_SIZE]
+            ).values_list('user_id', flat=True))
+        followers = sorted(followers)
+        for start in range(0, len(followers), CHUNK_SIZE):
+            for user in User.objects.filter(
+                pk__in=followers[start:start + CHUNK_SIZE]
+            ):
+                rebuild_timeline(user)
+        bump_feed_version(GLOBAL_SCOPE)
+        return fixed, len(followers)
+
+    def allocate(self, kind, obj, record):
+        model = MODELS[kind]
+        if model not in self.next_pk:
+            last = model.objects.aggregate(last=Max('pk'))['last']
+            self.next_pk[model] = (last or 0) + 1
+        obj.pk = self.next_pk[model]
+        self.next_pk[model] += 1
+        if 'id' in record:
+            self.ids[kind][str(record['id'])] = obj.pk
+        return obj
+
+    def resolve(self, kind, value, required=True):
+        if value in (None, ''):
+            if required:
+                raise ImportFailed(f'не указана ссылка на {kind}')
+            return None
+        value = str(value)
+        pk = self.ids[kind].get(value)
+        if pk is None and kind in NATURAL_KEYS:
+            pk = MODELS[kind].objects.filter(
+                **{NATURAL_KEYS[kind]: value}
+            ).values_list('pk', flat=True).first()
+            if pk is not None:
+                self.ids[kind][value] = pk
+        if pk is None:
+            raise ImportFailed(f'{kind}: нет записи с id {value}')
+        return pk
+
+    def date(self, value):
+        if not value:
+            return self.now
+        date = parse_datetime(value)
+        if date is None:
+            raise ImportFailed(f'некорректная дата {value}')
+        if settings.USE_TZ and timezone.is_naive(date):
+            date = timezone.make_aware(date, timezone.utc)
+        return date
+
+    def build_users(self, record):
+        return self.allocate('users', User(
+            username=record['username'],
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            email=record.get('email') or '',
+            password=record.get('password') or make_password(None),
+            date_joined=self.date(record.get('date_joined')),
+        ), record)
+
+    def build_groups(self, record):
+        return self.allocate('groups', Group(
+            title=record['title'],
+            slug=record['slug'],
+            description=record.get('description') or '',
+        ), record)
+
+    def build_posts(self, record):
+        author_id = self.resolve('users', record.get('author'))
+        self.authors.add(author_id)
+        return self.allocate('posts', Post(
+            title=record.get('title') or '',
+            text=record['text'],
+            author_id=author_id,
+            group_id=self.resolve(
+                'groups', record.get('group'), required=False
+            ),
+            image=record.get('image') or '',
+            pub_date=self.date(record.get('pub_date')),
+        ), record)
+
+    def build_comments(self, record):
+        return Comment(
+            post_id=self.resolve('posts', record.get('post')),
+            author_id=self.resolve('users', record.get('author')),
+            text=record['text'],
+            created=self.date(record.get('created')),
+        )
+
+    def build_follows(self, record):
+        user_id = self.resolve('users', record.get('user'))
+        author_id = self.resolve('users', record.get('author'))
+        if user_id == author_id:
+            raise ImportFailed('нельзя подписаться на самого себя')
+        self.followers.add(user_id)
+        return Follow(user_id=user_id, author_id=author_id)
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from statistics import median
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+
+from core.asgi import WsgiToAsgi
+from posts.models import Group, Post, User
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает ленты под параллельной нагрузкой: WSGI с запросами '
+        'по очереди и ASGI с одновременными независимыми запросами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Запросов к каждой странице в каждом режиме'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Одновременных запросов'
+        )
+        parser.add_argument(
+            '--query-workers',
+            type=int,
+            default=4,
+            help='FEED_QUERY_WORKERS для режима ASGI'
+        )
+        parser.add_argument(
+            '--user',
+            help='Пользователь для страниц с авторизацией и ленты подписок'
+        )
+        parser.add_argument(
+            '--cache',
+            action='store_true',
+            help='Не отключать кэш фрагментов лент'
+        )
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('Нет постов для замера')
+        urls = {
+            'index': reverse('posts:index'),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': post.author.username}
+            ),
+            'post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.pk}
+            ),
+        }
+        group = Group.objects.exclude(posts_count=0).first()
+        if group is not None:
+            urls['group_posts'] = reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            )
+        cookie = ''
+        if options['user']:
+            cookie = self.login(options['user'])
+            urls['follow_index'] = reverse('posts:follow_index')
+        overrides = {} if options['cache'] else {'FEED_CACHE_TIMEOUT': 0}
+        handler = WSGIHandler()
+        self.stdout.write(
+            f'{"страница":<14}{"режим":<7}{"запр/с":>9}'
+            f'{"p50, мс":>10}{"p95, мс":>10}'
+        )
+        for name, url in urls.items():
+            with override_settings(FEED_QUERY_WORKERS=0, **overrides):
+                sync = self.run_sync(handler, url, cookie, options)
+            with override_settings(
+                FEED_QUERY_WORKERS=options['query_workers'], **overrides
+            ):
+                concurrent = asyncio.run(
+                    self.run_async(handler, url, cookie, options)
+                )
+            for mode, (elapsed, timings) in (('wsgi', sync),
+                                             ('asgi', concurrent)):
+                self.stdout.write(
+                    f'{name:<14}{mode:<7}'
+                    f'{len(timings) / elapsed:>9.1f}'
+                    f'{median(timings) * 1000:>10.1f}'
+                    f'{percentile(timings, 0.95) * 1000:>10.1f}'
+                )
+
+    def login(self, username):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f'Пользователь {username} не найден')
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def run_sync(self, handler, url, cookie, options):
+        def request(_):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': url,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_COOKIE': cookie,
+                'wsgi.version': (1, 0),
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': self.stderr,
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            started = time.perf_counter()
+            result = handler(environ, start_response)
+            b''.join(result)
+            result.close()
+            return time.perf_counter() - started
+
+        def start_response(status, headers):
+            statuses.append(int(status.split(' ', 1)[0]))
+
+        statuses = []
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            timings = list(pool.map(request, range(options['requests'])))
+        self.check_statuses(url, statuses)
+        return time.perf_counter() - started, timings
+
+    async def run_async(self, handler, url, cookie, options):
+        application = WsgiToAsgi(handler, max_workers=options['concurrency'])
+        limit = asyncio.Semaphore(options['concurrency'])
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': url,
+            'query_string': b'',
+            'headers': [(b'cookie', cookie.encode())],
+            'server': ('localhost', 80),
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        statuses = []
+
+        async def request():
+            async with limit:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(
+            *(request() for _ in range(options['requests']))
+        )
+        elapsed = time.perf_counter() - started
+        application.executor.shutdown()
+        self.check_statuses(url, statuses)
+        return elapsed, timings
+
+    def check_statuses(self, url, statuses):
+        failed = [status for status in statuses if status >= 400]
+        if failed:
+            raise CommandError(
+                f'{url}: {len(failed)} ответов с ошибкой ({failed[0]})'
+            )
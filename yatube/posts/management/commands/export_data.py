@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import CHUNK_SIZE, COLUMNS, FORMATS, export_stream
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты или комментарии профиля либо группы'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--profile', metavar='USERNAME')
+        scope.add_argument('--group', metavar='SLUG')
+        parser.add_argument(
+            '--kind',
+            choices=tuple(COLUMNS),
+            default='posts',
+            help='Что выгружать (по умолчанию — посты)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='ndjson',
+            help='Формат выгрузки'
+        )
+        parser.add_argument(
+            '--output',
+            metavar='FILE',
+            help='Файл для выгрузки (по умолчанию — стандартный вывод)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Строк, читаемых из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        if options['profile']:
+            lookup = {'author': self.get(User, username=options['profile'])}
+        elif not options['group']:
+            raise CommandError('Укажите --profile или --group')
+        else:
+            lookup = {'group': self.get(Group, slug=options['group'])}
+        chunks = export_stream(
+            options['kind'],
+            options['format'],
+            options['chunk_size'],
+            **lookup
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='',
+                      encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+
+    def get(self, model, **lookup):
+        obj = model.objects.filter(**lookup).first()
+        if obj is None:
+            raise CommandError(f'Не найдено: {lookup}')
+        return obj
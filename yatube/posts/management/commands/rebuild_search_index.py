@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.search import (fts_available, missing_fts_triggers,
+                          rebuild_search_index)
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс публикаций'
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError(
+                'Полнотекстовый индекс доступен только в SQLite'
+            )
+        missing = missing_fts_triggers()
+        if missing:
+            raise CommandError(
+                f'Нет триггеров {", ".join(missing)}: индекс не будет '
+                f'обновляться. Создайте их заново миграцией'
+            )
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс пересобран'))
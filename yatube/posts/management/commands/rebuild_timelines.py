@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Timeline, User
+from posts.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок из таблицы Follow'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Пользователи, чьи ленты нужно пересобрать (по умолчанию все)'
+        )
+
+    def handle(self, *args, **options):
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        else:
+            Timeline.objects.all().delete()
+            users = User.objects.filter(follower__isnull=False).distinct()
+        count = 0
+        for user in users.iterator():
+            rebuild_timeline(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересобрано лент подписок: {count}'
+        ))
@@ -0,0 +1,56 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+def init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех изображений постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов (по умолчанию — число ядер)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=16,
+            help='Сколько изображений передавать процессу за раз'
+        )
+
+    def handle(self, *args, **options):
+        images = list(
+            Post.objects.exclude(image='')
+            .order_by('image')
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        # Соединения с базой нельзя наследовать в дочерних процессах.
+        connections.close_all()
+        started = time.monotonic()
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=init_worker
+        ) as pool:
+            results = list(pool.map(
+                generate_thumbnails, images, chunksize=options['chunk_size']
+            ))
+        failed = results.count(False)
+        self.stdout.write(
+            f'Обработано изображений: {len(results)}, ошибок: {failed}, '
+            f'время: {time.monotonic() - started:.1f} с'
+        )
+        if not failed:
+            self.stdout.write(self.style.SUCCESS('Миниатюры готовы'))
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from .storage import post_images
 
 User = get_user_model()
 
@@ -20,6 +22,11 @@ class Group(models.Model):
         verbose_name='Описание',
         help_text='Введите подробное описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество публикаций',
+        default=0,
+        editable=False
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -64,13 +71,41 @@ class Post(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='posts/',
+        storage=post_images,
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'публикации'
         verbose_name_plural = 'Публикации'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Проверка файла в хранилище (pre_save) и рост MediaFile.refs
+        # (post_save) идут в одной транзакции, то есть под той же
+        # блокировкой записи, что и delete_unused_image: файл не может
+        # удалиться между ними.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text[:TEXT_LENGHT]
@@ -106,6 +141,12 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -123,6 +164,91 @@ class Follow(models.Model):
     class Meta:
         verbose_name_plural = 'Подписки'
         verbose_name = 'Подписка'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='follow_unique_user_author'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.user} подписался на {self.author}'
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество публикаций',
+        default=0)
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0)
+    following_count = models.PositiveIntegerField(
+        verbose_name='Количество подписок',
+        default=0)
+
+    class Meta:
+        verbose_name = 'счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
+
+
+class Timeline(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Публикация')
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        verbose_name = 'запись ленты подписок'
+        verbose_name_plural = 'Лента подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='timeline_unique_user_post'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class MediaFile(models.Model):
+    name = models.CharField(
+        verbose_name='Файл',
+        max_length=100,
+        unique=True
+    )
+    refs = models.PositiveIntegerField(
+        verbose_name='Ссылок из постов',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
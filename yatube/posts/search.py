@@ -0,0 +1,124 @@
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .utils import CursorPage, CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+# Триггеры из миграции 0016: пересоздание posts_post в SQLite (например,
+# AlterField) удаляет их, и индекс перестаёт обновляться.
+FTS_TRIGGERS = tuple(
+    f'{FTS_TABLE}_{event}' for event in ('insert', 'delete', 'update')
+)
+WORD = re.compile(r'\w+')
+
+
+class MatchedIds(RawSQL):
+    """Подзапрос для __in без лишних скобок.
+
+    Django 2.2 сам оборачивает правую часть IN в скобки, а RawSQL
+    добавляет свои: SQLite читает IN ((SELECT ...)) как скалярный
+    подзапрос и берёт только первую строку.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def missing_fts_triggers():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type = 'trigger' AND tbl_name = 'posts_post'"
+        )
+        existing = {name for (name,) in cursor.fetchall()}
+    return [name for name in FTS_TRIGGERS if name not in existing]
+
+
+def fts_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5."""
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text.lower()))
+
+
+def search_ids(text, after=None, limit=-1):
+    """Возвращает пары (score, id) в порядке релевантности."""
+    match = fts_query(text)
+    if not match:
+        return []
+    sql = (
+        f'SELECT score, rowid FROM ('
+        f'SELECT bm25({FTS_TABLE}) AS score, rowid FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s)'
+    )
+    params = [match]
+    if after is not None:
+        sql += ' WHERE score > %s OR (score = %s AND rowid > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY score, rowid LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def filter_posts(queryset, text):
+    if not fts_available():
+        return queryset.filter(
+            Q(title__icontains=text) | Q(text__icontains=text)
+        )
+    match = fts_query(text)
+    if not match:
+        return queryset.none()
+    # Подзапрос вместо списка id: частое слово не упрётся в лимит
+    # переменных SQLite.
+    return queryset.filter(pk__in=MatchedIds(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+    ))
+
+
+def encode_search_cursor(score, pk):
+    return urlsafe_b64encode(f'{score!r}|{pk}'.encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    try:
+        score, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return float(score), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def search_page(text, cursor=None, per_page=10):
+    posts = Post.objects.select_related('author', 'group')
+    if not fts_available():
+        return CursorPaginator(
+            filter_posts(posts, text), per_page
+        ).get_page(cursor)
+    after = decode_search_cursor(cursor) if cursor else None
+
+    def fetch():
+        found = search_ids(text, after, per_page + 1)
+        next_cursor = None
+        if len(found) > per_page:
+            found = found[:per_page]
+            next_cursor = encode_search_cursor(*found[-1])
+        found_posts = posts.in_bulk([pk for _, pk in found])
+        objects = [found_posts[pk] for _, pk in found if pk in found_posts]
+        return objects, next_cursor, None
+
+    return CursorPage(None, fetch)
+
+
+def rebuild_search_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')"
+        )
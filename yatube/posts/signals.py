@@ -0,0 +1,95 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import (change_comments_counter, change_group_counter,
+                       change_image_refs, change_user_counter)
+from .feed_cache import (GLOBAL_SCOPE, bump_feed_version, comments_scope,
+                         group_scope, profile_scope)
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.author_id, 'posts_count', 1)
+        change_group_counter(instance.group_id, 1)
+        change_image_refs(instance.image.name, 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    change_user_counter(instance.author_id, 'posts_count', -1)
+    change_group_counter(instance.group_id, -1)
+    change_image_refs(instance.image.name, -1)
+
+
+def bump_post_feeds(author_id, group_id):
+    bump_feed_version(
+        'index', group_scope(group_id), profile_scope(author_id)
+    )
+
+
+def comments_changed(post_id, delta):
+    # comments_count отдаётся только в лентах API и меняется через update()
+    # без сигналов Post. HTML-ленты его не показывают, поэтому сбрасывается
+    # отдельная версия, а их кэш остаётся целым.
+    change_comments_counter(post_id, delta)
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        author_id, group_id = post
+        bump_feed_version(*map(comments_scope, (
+            'index', group_scope(group_id), profile_scope(author_id)
+        )))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        comments_changed(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    comments_changed(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_user_counter(instance.author_id, 'followers_count', 1)
+        change_user_counter(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_user_counter(instance.author_id, 'followers_count', -1)
+    change_user_counter(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_post_feeds(instance.author_id, instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_feed_version(GLOBAL_SCOPE)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or update_fields == frozenset(('last_login',)):
+        return
+    bump_feed_version(GLOBAL_SCOPE)
@@ -0,0 +1,45 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+CHUNK_SIZE: int = 64 * 1024
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем из SHA-256 содержимого.
+
+    Файл сохраняется как <каталог>/<2 символа хэша>/<хэш>.<расширение>;
+    одинаковые загрузки получают одно имя, и второй раз файл не пишется.
+    Содержимое по имени никогда не меняется, поэтому его можно кэшировать
+    навсегда. Сколько постов ссылается на файл, считает MediaFile.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя выбирает _save по содержимому.
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        directory = os.path.join(os.path.dirname(name), digest[:2])
+        name = os.path.join(directory, f'{digest}{extension}')
+        if self.exists(name):
+            return name.replace('\\', '/')
+        # Файл пишется под временным именем и переименовывается: под
+        # итоговым именем он появляется целиком. Параллельная загрузка того
+        # же содержимого просто заменит файл таким же.
+        temporary = super()._save(
+            os.path.join(directory, f'.{uuid.uuid4().hex}.tmp'), content
+        )
+        os.replace(self.path(temporary), self.path(name))
+        return name.replace('\\', '/')
+
+
+post_images = ContentAddressedStorage()
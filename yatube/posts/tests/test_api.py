@@ -0,0 +1,188 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..timeline import backfill_timeline
+
+User = get_user_model()
+
+
+def read_json(response):
+    if response.streaming:
+        return json.loads(b''.join(response.streaming_content))
+    return json.loads(response.content)
+
+
+@override_settings(POSTS_ON_PAGE=4, COMMENTS_ON_PAGE=2)
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        cls.posts = [
+            Post.objects.create(
+                title=f'Пост {number}',
+                text=f'Тестовый текст {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None
+            )
+            for number in range(10)
+        ]
+        cls.post = cls.posts[-1]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        backfill_timeline(cls.user, cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def collect(self, url, client=None, **params):
+        client = client or self.guest_client
+        results = []
+        response = client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = read_json(response)
+            results.extend(data['results'])
+            if data['next'] is None:
+                return results
+            response = client.get(data['next'])
+
+    def test_feeds_cover_all_posts(self):
+        """Ленты API проходят все посты курсором без повторов."""
+        feeds = {
+            reverse('api:index'): Post.objects.all(),
+            reverse('api:group_list', kwargs={'slug': 'test-slug'}):
+                self.group.posts.all(),
+            reverse('api:profile', kwargs={'username': 'author'}):
+                self.author.posts.all(),
+        }
+        for url, posts in feeds.items():
+            with self.subTest(url=url):
+                ids = [post['id'] for post in self.collect(url)]
+                expected = list(posts.order_by('-pub_date', '-pk')
+                                .values_list('pk', flat=True))
+                self.assertEqual(ids, expected)
+
+    def test_follow_feed(self):
+        """Лента подписок доступна только авторизованному пользователю."""
+        url = reverse('api:follow_index')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 401)
+        posts = self.collect(url, client=self.authorized_client)
+        self.assertEqual(len(posts), len(self.posts))
+
+    def test_sparse_fields(self):
+        """Параметр fields ограничивает поля ответа и выборку."""
+        url = reverse('api:index')
+        with self.assertNumQueries(1) as queries:
+            data = read_json(
+                self.guest_client.get(url, {'fields': 'id,author'})
+            )
+        self.assertEqual(
+            data['results'][0], {'id': self.post.pk, 'author': 'author'}
+        )
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertIn('fields=id%2Cauthor', data['next'])
+
+    def test_unknown_field(self):
+        """Неизвестное поле возвращает ошибку 400."""
+        response = self.guest_client.get(
+            reverse('api:index'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', read_json(response)['detail'])
+
+    def test_post_detail(self):
+        """Пост отдаётся отдельным объектом."""
+        url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        data = read_json(self.guest_client.get(url))
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['group'], 'test-slug')
+        self.assertEqual(data['comments_count'], 3)
+        self.assertIsNone(data['image'])
+        missing = reverse('api:post_detail', kwargs={'post_id': 0})
+        self.assertEqual(self.guest_client.get(missing).status_code, 404)
+
+    def test_post_comments(self):
+        """Комментарии поста проходят курсором по страницам."""
+        url = reverse('api:post_comments', kwargs={'post_id': self.post.pk})
+        comments = self.collect(url)
+        self.assertEqual(
+            [comment['text'] for comment in comments],
+            ['Комментарий 2', 'Комментарий 1', 'Комментарий 0']
+        )
+
+    def test_missing_group_and_profile(self):
+        """Несуществующие группа и профиль возвращают 404."""
+        urls = (
+            reverse('api:group_list', kwargs={'slug': 'missing'}),
+            reverse('api:profile', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        url = reverse('api:index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        other = self.guest_client.get(url, {'fields': 'id'})
+        self.assertNotEqual(other['ETag'], etag)
+
+    def test_comments_change_feed_etags(self):
+        """Новый и удалённый комментарий меняют ETag лент с постом."""
+        urls = (
+            reverse('api:index'),
+            reverse('api:group_list', kwargs={'slug': self.group.slug}),
+            reverse('api:profile', kwargs={'username': self.author}),
+        )
+        post = self.posts[1]
+        for change in ('create', 'delete'):
+            etags = {url: self.guest_client.get(url)['ETag'] for url in urls}
+            if change == 'create':
+                comment = Comment.objects.create(
+                    post=post, author=self.user, text='Новый комментарий'
+                )
+            else:
+                comment.delete()
+            for url, etag in etags.items():
+                with self.subTest(change=change, url=url):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_comments_keep_html_feed_etags(self):
+        """Комментарий не сбрасывает ETag HTML-лент: счётчика в них нет."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+        etags = {url: self.guest_client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(
+            post=self.posts[1], author=self.user, text='Новый комментарий'
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
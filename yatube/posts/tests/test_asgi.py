@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.asgi import WsgiToAsgi
+from yatube.asgi import application
+
+from ..concurrency import gather
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+def call(app, path, query_string=b'', headers=()):
+    """Выполняет HTTP-запрос к ASGI-приложению и собирает ответ."""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query_string,
+        'headers': list(headers),
+    }
+    asyncio.run(app(scope, receive, send))
+    start, *body = messages
+    return start, b''.join(message['body'] for message in body)
+
+
+class AsgiTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author
+        )
+
+    def test_index_served(self):
+        """ASGI-приложение отдаёт главную страницу."""
+        start, body = call(application, reverse('posts:index'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn(self.post.text, body.decode())
+
+    def test_streaming_response_with_query(self):
+        """Потоковый ответ API передаётся вместе с параметрами запроса."""
+        start, body = call(
+            application,
+            reverse('api:index'),
+            query_string=b'fields=id',
+            headers=[(b'accept', b'application/json')],
+        )
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'application/json'), start['headers'])
+        self.assertEqual(
+            json.loads(body)['results'], [{'id': self.post.pk}]
+        )
+
+    def test_lifespan(self):
+        """Приложение отвечает на события запуска и остановки."""
+        app = WsgiToAsgi(lambda environ, start_response: [])
+        incoming = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(
+            sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+
+@override_settings(FEED_QUERY_WORKERS=2)
+class ConcurrentQueriesTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(
+            text='Тестовый текст', author=self.author
+        )
+        Follow.objects.create(user=self.user, author=self.author)
+
+    def test_gather_uses_threads(self):
+        """Независимые запросы выполняются в разных потоках."""
+        main, other = gather(threading.get_ident, threading.get_ident)
+        self.assertEqual(main, threading.get_ident())
+        self.assertNotEqual(other, main)
+
+    def test_gather_in_transaction_is_sequential(self):
+        """Внутри транзакции запросы выполняются в текущем потоке."""
+        with transaction.atomic():
+            idents = gather(threading.get_ident, threading.get_ident)
+        self.assertEqual(set(idents), {threading.get_ident()})
+
+    def test_pages_with_concurrent_queries(self):
+        """Профиль и пост собираются из одновременных запросов."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['author'], self.author)
+        response = client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(response.context['post'], self.post)
+        response = client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
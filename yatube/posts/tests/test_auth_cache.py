@@ -0,0 +1,146 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+SHARED_CACHE_DIR = tempfile.mkdtemp()
+SHARED_CACHE = {
+    'CACHES': {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': SHARED_CACHE_DIR,
+    }},
+    'SHARED_CACHE': True,
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'AUTH_USER_CACHE_TIMEOUT': 5 * 60,
+}
+
+
+def tearDownModule():
+    shutil.rmtree(SHARED_CACHE_DIR, ignore_errors=True)
+
+
+@override_settings(**SHARED_CACHE)
+class CachedAuthTests(TestCase):
+    """С общим кэшем сессия и пользователь запроса берутся из кэша."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='reader', password='old-Passw0rd'
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.other_client = Client()
+        self.other_client.force_login(self.user)
+        self.url = reverse('posts:follow_index')
+
+    def assertLoggedIn(self, client, logged_in=True):
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200 if logged_in else 302)
+
+    def test_no_queries_for_session_and_user(self):
+        """Повторный запрос не читает сессию и пользователя из базы."""
+        url = reverse('about:author')
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_ends_other_sessions(self):
+        """После смены пароля другие сессии перестают действовать."""
+        self.assertLoggedIn(self.other_client)
+        response = self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-Passw0rd',
+            'new_password1': 'new-Passw0rd',
+            'new_password2': 'new-Passw0rd',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        self.assertLoggedIn(self.client)
+        self.assertLoggedIn(self.other_client, logged_in=False)
+
+    def test_password_reset_ends_sessions(self):
+        """Новый пароль, заданный в обход сессии, тоже сбрасывает её."""
+        self.assertLoggedIn(self.client)
+        self.user.set_password('new-Passw0rd')
+        self.user.save()
+        self.assertLoggedIn(self.client, logged_in=False)
+
+    def test_logout(self):
+        """Выход завершает только свою сессию."""
+        self.assertLoggedIn(self.client)
+        self.client.get(reverse('users:logout'))
+        self.assertLoggedIn(self.client, logged_in=False)
+        self.assertLoggedIn(self.other_client)
+
+    def test_deactivated_user(self):
+        """Заблокированный пользователь сразу становится анонимным."""
+        self.assertLoggedIn(self.client)
+        self.user.is_active = False
+        self.user.save()
+        self.assertLoggedIn(self.client, logged_in=False)
+
+
+class WorkersLogoutTests(TestCase):
+    """Выход и смена пароля в одном воркере действуют во всех."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='reader', password='old-Passw0rd'
+        )
+        self.url = reverse('posts:follow_index')
+
+    def worker(self, name):
+        """Настройки кэша отдельного процесса со своей памятью."""
+        config = dict(settings.CACHES['default'])
+        if not settings.SHARED_CACHE:
+            config['LOCATION'] = name
+        return override_settings(CACHES={'default': config})
+
+    def login(self):
+        """Входит в воркере a и прогревает кэш воркера b копией сессии."""
+        with self.worker('a'):
+            cache.clear()
+            client = Client()
+            client.force_login(self.user)
+        replay = Client()
+        cookie = settings.SESSION_COOKIE_NAME
+        replay.cookies[cookie] = client.cookies[cookie].value
+        with self.worker('b'):
+            cache.clear()
+            self.assertEqual(replay.get(self.url).status_code, 200)
+        return client, replay
+
+    def check_workers(self, action):
+        client, replay = self.login()
+        with self.worker('a'):
+            action(client)
+        with self.worker('b'):
+            self.assertEqual(replay.get(self.url).status_code, 302)
+
+    def configurations(self):
+        yield 'settings', override_settings()
+        yield 'shared', override_settings(**SHARED_CACHE)
+
+    def test_logout_is_not_replayed(self):
+        """Cookie сессии после выхода не действует в другом воркере."""
+        for name, configuration in self.configurations():
+            with self.subTest(configuration=name), configuration:
+                self.check_workers(
+                    lambda client: client.get(reverse('users:logout'))
+                )
+
+    def test_password_change_in_other_worker(self):
+        """Смена пароля в одном воркере завершает сессию в другом."""
+        def change_password(client):
+            self.user.set_password('new-Passw0rd')
+            self.user.save()
+
+        for name, configuration in self.configurations():
+            with self.subTest(configuration=name), configuration:
+                self.check_workers(change_password)
@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase
+
+from core.benchmark import compare, percentile
+
+
+def result(p50, queries=3, status=200):
+    return {'p50': p50, 'p95': p50, 'queries': queries, 'status': status}
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_percentile(self):
+        """Перцентиль берётся по ближайшему рангу без интерполяции."""
+        values = [5, 1, 4, 2, 3, 10, 9, 8, 7, 6]
+        self.assertEqual(percentile(values, 50), 5)
+        self.assertEqual(percentile(values, 95), 10)
+        self.assertEqual(percentile(values, 99), 10)
+        self.assertEqual(percentile(values, 1), 1)
+        self.assertEqual(percentile([42], 50), 42)
+
+    def test_no_regressions(self):
+        """Шум в пределах порогов и новые URL не считаются регрессией."""
+        baseline = {'index': result(10.0), 'profile': result(40.0)}
+        results = {
+            'index': result(14.9),
+            'profile': result(49.0, queries=2),
+            'new': result(500.0),
+        }
+        self.assertEqual(compare(results, baseline), [])
+
+    def test_regressions(self):
+        """Рост задержки, числа запросов и смена статуса — регрессии."""
+        baseline = {
+            'slow': result(20.0),
+            'queries': result(10.0),
+            'status': result(10.0),
+        }
+        results = {
+            'slow': result(30.0),
+            'queries': result(10.0, queries=4),
+            'status': result(10.0, status=500),
+        }
+        self.assertEqual(compare(results, baseline), [
+            'queries: запросов 3 -> 4',
+            'slow: p50 20.0 -> 30.0 мс',
+            'status: статус 200 -> 500',
+        ])
+
+    def test_thresholds(self):
+        """Задержка сравнивается по metric с порогами threshold и min_delta."""
+        baseline = {'index': result(100.0)}
+        results = {'index': {**result(100.0), 'p95': 140.0}}
+        self.assertEqual(compare(results, baseline), [])
+        self.assertEqual(
+            compare(results, baseline, metric='p95'),
+            ['index: p95 100.0 -> 140.0 мс'],
+        )
+        self.assertEqual(
+            compare(results, baseline, threshold=0.5, metric='p95'), []
+        )
+        self.assertEqual(
+            compare(results, baseline, min_delta=50, metric='p95'), []
+        )
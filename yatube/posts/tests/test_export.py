@@ -0,0 +1,110 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        cls.posts = [
+            Post.objects.create(
+                title=f'Пост {number}',
+                text=f'Тестовый текст {number}',
+                author=cls.author,
+                group=cls.group if number % 2 else None
+            )
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[1], author=cls.author, text='Комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_ndjson(self):
+        """Выгрузка профиля отдаёт все посты в NDJSON."""
+        response = self.client.get(
+            reverse('posts:profile_export', kwargs={'username': 'author'})
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn('author-posts.ndjson', response['Content-Disposition'])
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [post.pk for post in self.posts])
+        self.assertEqual(rows[1]['group'], 'test-slug')
+        self.assertEqual(rows[1]['author'], 'author')
+
+    def test_group_export_csv(self):
+        """Выгрузка группы отдаёт комментарии к её постам в CSV."""
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'test-slug'}),
+            {'kind': 'comments', 'format': 'csv'}
+        )
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['post'], str(self.posts[1].pk))
+        self.assertEqual(rows[0]['text'], 'Комментарий')
+
+    def test_export_bad_request(self):
+        """Неизвестный формат выгрузки возвращает 400."""
+        response = self.client.get(
+            reverse('posts:profile_export', kwargs={'username': 'author'}),
+            {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_requires_login(self):
+        """Выгрузка доступна только авторизованным пользователям."""
+        url = reverse('posts:group_export', kwargs={'slug': 'test-slug'})
+        response = Client().get(url)
+        self.assertRedirects(response, f'/auth/login/?next={url}')
+
+    def test_export_command_round_trip(self):
+        """Выгрузку команды export_data можно загрузить import_data."""
+        path = os.path.join(TEMP_DIR, 'posts.csv')
+        call_command(
+            'export_data', profile='author', format='csv', output=path,
+            chunk_size=2
+        )
+        Post.objects.all().delete()
+        call_command('import_data', posts=path, stdout=StringIO())
+        self.assertEqual(
+            list(self.author.posts.order_by('pk').values_list(
+                'text', 'pub_date', 'group'
+            )),
+            [(post.text, post.pub_date, post.group_id)
+             for post in self.posts]
+        )
@@ -1,13 +1,35 @@
+import shutil
+import tempfile
 from http import HTTPStatus
+from io import BytesIO
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image, ImageCms
+from sorl.thumbnail import default, get_thumbnail
 
+from ..images import normalize_image
 from ..models import Comment, Group, Post
+from ..thumbnails import POST_THUMBNAILS, generate_thumbnails
 
 User = get_user_model()
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
 
 class PostFormTests(TestCase):
     """Создание тестового юзера и постов в группу"""
@@ -94,3 +116,112 @@ class PostFormTests(TestCase):
         self.assertEqual(comment.text, self.form_data_comment['text'])
         self.assertEqual(comment.post, PostFormTests.post)
         self.assertEqual(comment.author, PostFormTests.user)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageFormTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_image_upload_schedules_thumbnails(self):
+        """Загрузка изображения ставит миниатюры в очередь."""
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        with mock.patch('posts.forms.schedule_thumbnails') as schedule:
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'title': 'Заголовок', 'text': 'Текст', 'image': uploaded}
+            )
+        post = Post.objects.get(text='Текст')
+        schedule.assert_called_once_with(post.image.name)
+
+    def test_image_is_normalized(self):
+        """Большое изображение уменьшается, перекодируется и теряет EXIF."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        source = BytesIO()
+        Image.new('RGB', (3000, 1500), 'red').save(
+            source, 'JPEG', exif=exif.tobytes()
+        )
+        uploaded = SimpleUploadedFile(
+            name='photo.jpg',
+            content=source.getvalue(),
+            content_type='image/jpeg'
+        )
+        with mock.patch('posts.forms.schedule_thumbnails'):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={'title': 'Фото', 'text': 'Фото', 'image': uploaded}
+            )
+        post = Post.objects.get(text='Фото')
+        self.assertTrue(post.image.name.endswith('.webp'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, settings.POST_IMAGE_FORMAT)
+            self.assertEqual(
+                max(image.size), settings.POST_IMAGE_MAX_SIZE
+            )
+            self.assertNotIn('exif', image.info)
+
+    def test_cmyk_image_is_converted_without_profile(self):
+        """CMYK переводится в RGB, профиль ICC не переносится."""
+        profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB'))
+        source = BytesIO()
+        Image.new('CMYK', (10, 10), (0, 255, 255, 0)).save(
+            source, 'JPEG', icc_profile=profile.tobytes()
+        )
+        result = normalize_image(SimpleUploadedFile(
+            'cmyk.jpg', source.getvalue(), content_type='image/jpeg'
+        ))
+        with Image.open(result) as image:
+            self.assertEqual(image.mode, 'RGB')
+            self.assertNotIn('icc_profile', image.info)
+            red, green, blue = image.getpixel((5, 5))
+            self.assertGreater(red, 200)
+            self.assertLess(max(green, blue), 60)
+
+    def test_broken_images_are_rejected(self):
+        """Бомба декомпрессии и битый файл — ошибка формы, а не 500."""
+        source = BytesIO()
+        Image.effect_noise((20, 20), 100).save(source, 'PNG')
+        images = (
+            ('image_too_large', source.getvalue(), 100),
+            ('invalid_image', source.getvalue()[:200], Image.MAX_IMAGE_PIXELS),
+        )
+        for code, content, max_pixels in images:
+            with self.subTest(code=code), \
+                    mock.patch.object(Image, 'MAX_IMAGE_PIXELS', max_pixels):
+                with self.assertRaises(ValidationError) as error:
+                    normalize_image(SimpleUploadedFile('image.png', content))
+                self.assertEqual(error.exception.code, code)
+
+    def test_generate_thumbnails(self):
+        """Миниатюры шаблонов создаются заранее."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Текст',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        self.assertTrue(generate_thumbnails(post.image.name))
+        for geometry, options in POST_THUMBNAILS:
+            with self.subTest(geometry=geometry):
+                # Шаблон получает готовую миниатюру, не открывая исходник.
+                with mock.patch.object(
+                    default.engine, 'get_image'
+                ) as get_image:
+                    thumbnail = get_thumbnail(post.image, geometry, **options)
+                get_image.assert_not_called()
+                self.assertTrue(thumbnail.exists())
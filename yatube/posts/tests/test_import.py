@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post, Timeline
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ImportDataTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def ndjson(self, name, records):
+        return self.write(
+            name, '\n'.join(json.dumps(record) for record in records)
+        )
+
+    def import_data(self, **files):
+        out = StringIO()
+        call_command('import_data', stdout=out, **files)
+        return out.getvalue()
+
+    def test_import_all_kinds(self):
+        """Файлы NDJSON и CSV загружаются со ссылками по id из файлов."""
+        users = self.ndjson('users.ndjson', [
+            {'id': 10, 'username': 'reader'},
+            {'id': 11, 'username': 'author', 'first_name': 'Лев'},
+        ])
+        groups = self.ndjson('groups.ndjson', [
+            {'id': 'g1', 'title': 'Группа', 'slug': 'group'},
+        ])
+        posts = self.ndjson('posts.ndjson', [
+            {'id': 100 + number, 'author': 11, 'group': 'g1',
+             'text': f'Пост {number}',
+             'pub_date': f'2020-01-0{number + 1}T10:00:00'}
+            for number in range(5)
+        ])
+        comments = self.write(
+            'comments.csv',
+            'post,author,text,created\n'
+            '104,10,Первый,2020-02-01T10:00:00+00:00\n'
+            '104,11,Второй,\n'
+        )
+        follows = self.write('follows.csv', 'user,author\n10,11\n10,11\n')
+        output = self.import_data(
+            users=users, groups=groups, posts=posts,
+            comments=comments, follows=follows, batch_size=2
+        )
+        self.assertIn('posts: 5 записей', output)
+        author = User.objects.get(username='author')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(author.first_name, 'Лев')
+        self.assertFalse(author.has_usable_password())
+        latest = Post.objects.first()
+        self.assertEqual(latest.text, 'Пост 4')
+        self.assertEqual(latest.author, author)
+        self.assertEqual(latest.group.slug, 'group')
+        self.assertEqual(
+            latest.pub_date, datetime(2020, 1, 5, 10, tzinfo=timezone.utc)
+        )
+        self.assertEqual(latest.comments.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+        latest.refresh_from_db()
+        self.assertEqual(latest.comments_count, 2)
+        self.assertEqual(author.stats.posts_count, 5)
+        self.assertEqual(author.stats.followers_count, 1)
+        self.assertEqual(Group.objects.get().posts_count, 5)
+        self.assertEqual(Timeline.objects.filter(user=reader).count(), 5)
+        new_post = Post.objects.create(text='Новый пост', author=reader)
+        self.assertGreater(new_post.pk, latest.pk)
+
+    def test_reference_existing_user(self):
+        """На существующих пользователей можно ссылаться по username."""
+        author = User.objects.create_user(username='existing')
+        posts = self.ndjson('posts.ndjson', [
+            {'author': 'existing', 'text': 'Пост'},
+        ])
+        self.import_data(posts=posts)
+        self.assertEqual(author.posts.get().text, 'Пост')
+
+    def test_unknown_reference(self):
+        """Ссылка на неизвестную запись останавливает загрузку."""
+        comments = self.write('comments.csv', 'post,author,text\n1,1,Текст\n')
+        with self.assertRaisesMessage(CommandError, 'нет записи с id 1'):
+            self.import_data(comments=comments)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_missing_field(self):
+        """Запись без обязательного поля указывает номер записи."""
+        users = self.ndjson('users.ndjson', [{'id': 1}])
+        with self.assertRaisesMessage(
+            CommandError, "users, запись 1: нет поля 'username'"
+        ):
+            self.import_data(users=users)
+
+    def test_failure_keeps_counters_of_saved_batches(self):
+        """После ошибки сохранённые пачки получают счётчики и ленты."""
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        follows = self.ndjson('follows.ndjson', [
+            {'user': 'reader', 'author': 'author'},
+        ])
+        self.import_data(follows=follows)
+        posts = self.ndjson('posts.ndjson', [
+            {'author': 'author', 'text': 'Первый'},
+            {'author': 'author', 'text': 'Второй'},
+            {'author': 'unknown', 'text': 'Третий'},
+        ])
+        with self.assertRaisesMessage(CommandError, 'Пачки до ошибки'):
+            self.import_data(posts=posts, batch_size=2)
+        author.stats.refresh_from_db()
+        self.assertEqual(author.stats.posts_count, 2)
+        self.assertEqual(Timeline.objects.filter(user=reader).count(), 2)
+
+    def test_stdin_stays_open(self):
+        """Чтение из «-» не закрывает стандартный ввод."""
+        stdin = StringIO(json.dumps({'username': 'reader'}))
+        with mock.patch('sys.stdin', stdin):
+            self.import_data(users='-')
+        self.assertFalse(stdin.closed)
+        self.assertTrue(User.objects.filter(username='reader').exists())
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.jobs import claim, run, task
+from core.models import Job
+
+CALLS = []
+
+
+@task
+def record(value, suffix=''):
+    CALLS.append(f'{value}{suffix}')
+
+
+@task(max_attempts=2)
+def fail(value):
+    raise ValueError(f'ошибка {value}')
+
+
+@override_settings(JOB_RETRY_DELAY=30)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_run(self):
+        """Задача выполняется с аргументами из очереди."""
+        job = record.enqueue(1, suffix='!')
+        self.assertEqual(job.task, 'posts.tests.test_jobs.record')
+        [(job_id, attempt)] = claim(10)
+        self.assertEqual(run(job_id, attempt), (job.pk, True))
+        self.assertEqual(CALLS, ['1!'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNotNone(job.finished)
+
+    def test_idempotency_key(self):
+        """Задача с известным ключом в очередь повторно не попадает."""
+        first = record.enqueue(1, key='once')
+        second = record.enqueue(2, key='once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_key_is_free_after_job_finishes(self):
+        """После выполнения или отказа задачу с тем же ключом ставят снова."""
+        first = record.enqueue(1, key='once')
+        [(job_id, attempt)] = claim(10)
+        self.assertEqual(record.enqueue(2, key='once').pk, first.pk)
+        run(job_id, attempt)
+        second = record.enqueue(3, key='once')
+        self.assertNotEqual(second.pk, first.pk)
+        Job.objects.filter(pk=second.pk).update(status=Job.FAILED)
+        third = record.enqueue(4, key='once')
+        self.assertNotIn(third.pk, (first.pk, second.pk))
+        self.assertEqual(record.enqueue(5, key='once').pk, third.pk)
+
+    def test_run_deleted_job(self):
+        """Удалённая после захвата задача не роняет воркер."""
+        record.enqueue(1)
+        [(job_id, attempt)] = claim(10)
+        Job.objects.filter(pk=job_id).delete()
+        self.assertEqual(run(job_id, attempt), (job_id, False))
+        self.assertEqual(CALLS, [])
+
+    def test_priority(self):
+        """Задачи с большим приоритетом забираются первыми."""
+        low = record.enqueue('low')
+        high = record.enqueue('high', priority=10)
+        record.enqueue('later', priority=20, delay=60)
+        self.assertEqual(
+            [job_id for job_id, _ in claim(10)], [high.pk, low.pk]
+        )
+
+    def test_retry_with_backoff(self):
+        """Ошибка повторяется позже, пока не кончатся попытки."""
+        job = fail.enqueue(1)
+        started = timezone.now()
+        [(job_id, attempt)] = claim(10)
+        self.assertEqual(run(job_id, attempt), (job.pk, False))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.last_error, 'ValueError: ошибка 1')
+        self.assertGreaterEqual(job.run_after, started + timedelta(seconds=30))
+        self.assertEqual(claim(10), [])
+        Job.objects.update(run_after=timezone.now())
+        [(job_id, attempt)] = claim(10)
+        self.assertEqual(attempt, 2)
+        run(job_id, attempt)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_visibility_timeout(self):
+        """Задачу пропавшего воркера забирает другой, его отчёт не нужен."""
+        job = record.enqueue(1)
+        [(job_id, first_attempt)] = claim(10)
+        self.assertEqual(claim(10), [])
+        Job.objects.update(run_after=timezone.now())
+        [(_, second_attempt)] = claim(10)
+        self.assertEqual(second_attempt, first_attempt + 1)
+        run(job_id, first_attempt)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        run(job_id, second_attempt)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+
+class RunJobsCommandTests(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_on_commit(self):
+        """Задача попадает в очередь после фиксации, её выполняет воркер."""
+        with transaction.atomic():
+            for number in range(5):
+                record.enqueue_on_commit(number)
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(Job.objects.count(), 5)
+        out = StringIO()
+        call_command('run_jobs', burst=True, concurrency=2, stdout=out)
+        self.assertEqual(sorted(CALLS), ['0', '1', '2', '3', '4'])
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 5
+        )
+        self.assertEqual(out.getvalue().count('выполнена'), 5)
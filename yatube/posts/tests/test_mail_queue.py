@@ -0,0 +1,186 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.mail import LEASE, claim, deliver, send_queued
+from core.models import QueuedEmail
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionRefusedError('сервер недоступен')
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('нет соединения')
+
+    def send_messages(self, email_messages):
+        return len(email_messages)
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    MAIL_QUEUE_DELIVERY_BACKEND=(
+        'django.core.mail.backends.filebased.EmailBackend'
+    ),
+    EMAIL_FILE_PATH=TEMP_DIR,
+)
+class MailQueueTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+        User.objects.create_user(
+            username='reader', email='reader@ya.ru', password='Passw0rd-1'
+        )
+
+    def sent_files(self):
+        if not os.path.isdir(TEMP_DIR):
+            return []
+        return os.listdir(TEMP_DIR)
+
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля уходит из очереди, а не во время запроса."""
+        response = Client().post(
+            reverse('users:password_reset'), {'email': 'reader@ya.ru'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(self.sent_files(), [])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipients, 'reader@ya.ru')
+        call_command('send_queued_mail', stdout=open(os.devnull, 'w'))
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.SENT)
+        self.assertEqual(email.attempts, 1)
+        [filename] = self.sent_files()
+        with open(os.path.join(TEMP_DIR, filename), encoding='utf-8') as file:
+            self.assertIn('/auth/reset/', file.read())
+
+    @override_settings(
+        MAIL_QUEUE_DELIVERY_BACKEND='posts.tests.test_mail_queue.'
+                                    'CountingBackend'
+    )
+    def test_batch_uses_one_connection(self):
+        """Пачка писем отправляется через одно соединение."""
+        for number in range(3):
+            mail.send_mail('Тема', f'Письмо {number}', None, ['a@ya.ru'])
+        CountingBackend.opened = 0
+        self.assertEqual(send_queued(batch_size=2), (2, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(send_queued(batch_size=2), (1, 0))
+        self.assertEqual(send_queued(batch_size=2), (0, 0))
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(
+        MAIL_QUEUE_DELIVERY_BACKEND='posts.tests.test_mail_queue.'
+                                    'FailingBackend',
+        MAIL_QUEUE_MAX_ATTEMPTS=2,
+        MAIL_QUEUE_RETRY_DELAY=60,
+    )
+    def test_retry_with_backoff(self):
+        """Неудачная отправка повторяется позже, затем письмо брошено."""
+        mail.send_mail('Тема', 'Текст', None, ['a@ya.ru'])
+        started = timezone.now()
+        self.assertEqual(send_queued(), (0, 1))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.PENDING)
+        self.assertIn('сервер недоступен', email.last_error)
+        self.assertGreaterEqual(
+            email.next_attempt, started + timedelta(seconds=60)
+        )
+        self.assertEqual(send_queued(), (0, 0))
+        email.next_attempt = timezone.now()
+        email.save()
+        self.assertEqual(send_queued(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    @override_settings(
+        MAIL_QUEUE_DELIVERY_BACKEND='posts.tests.test_mail_queue.'
+                                    'UnreachableBackend',
+        MAIL_QUEUE_MAX_ATTEMPTS=2,
+    )
+    def test_connection_failure_counts_as_attempt(self):
+        """Ошибка открытия соединения — неудачная попытка всей пачки."""
+        for number in range(2):
+            mail.send_mail('Тема', f'Письмо {number}', None, ['a@ya.ru'])
+        started = timezone.now()
+        self.assertEqual(send_queued(), (0, 2))
+        for email in QueuedEmail.objects.all():
+            self.assertEqual(email.status, QueuedEmail.PENDING)
+            self.assertIn('нет соединения', email.last_error)
+            self.assertGreaterEqual(
+                email.next_attempt,
+                started + timedelta(seconds=settings.MAIL_QUEUE_RETRY_DELAY)
+            )
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(send_queued(), (0, 2))
+        self.assertFalse(
+            QueuedEmail.objects.exclude(status=QueuedEmail.FAILED).exists()
+        )
+
+    @override_settings(MAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_expired_last_attempt_is_failed(self):
+        """Письмо, чья последняя попытка осталась без отчёта, брошено."""
+        mail.send_mail('Тема', 'Текст', None, ['a@ya.ru'])
+        for _ in range(2):
+            self.assertEqual(len(claim(10)), 1)
+            QueuedEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(claim(10), [])
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    def test_claimed_email_is_not_claimed_again(self):
+        """Забранное письмо не достаётся второму воркеру до конца срока."""
+        mail.send_mail('Тема', 'Текст', None, ['a@ya.ru'])
+        [email] = claim(10)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(claim(10), [])
+        QueuedEmail.objects.update(next_attempt=timezone.now())
+        [again] = claim(10)
+        self.assertEqual(again.attempts, 2)
+
+    def test_stale_worker_report_is_ignored(self):
+        """Отчёт воркера, у которого письмо уже забрали, не сохраняется."""
+        mail.send_mail('Тема', 'Текст', None, ['a@ya.ru'])
+        stale = claim(10)
+        QueuedEmail.objects.update(
+            next_attempt=timezone.now() - LEASE
+        )
+        current = claim(10)
+        self.assertEqual(deliver(stale), (1, 0))
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.status, QueuedEmail.PENDING)
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(deliver(current), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, QueuedEmail.SENT)
@@ -0,0 +1,106 @@
+import multiprocessing
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import Counter, Histogram, collect
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+TEST_COUNTER = Counter(
+    'yatube_test_events_total', 'Тестовый счётчик.', ['kind']
+)
+TEST_HISTOGRAM = Histogram(
+    'yatube_test_seconds', 'Тестовая гистограмма.', buckets=(0.1, 1)
+)
+
+
+def increment_in_child():
+    TEST_COUNTER.inc(kind='child')
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Тестовый текст', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def sample(self, line_start):
+        for line in collect().splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    def test_view_latency_and_fragment_cache(self):
+        """Метрики считают ответы по view и попадания в кэш фрагментов."""
+        count = ('yatube_http_request_duration_seconds_count'
+                 '{view="posts:index"}')
+        hits = ('yatube_fragment_cache_total'
+                '{fragment="index_page",result="hit"}')
+        misses = ('yatube_fragment_cache_total'
+                  '{fragment="index_page",result="miss"}')
+        before = [self.sample(name) for name in (count, hits, misses)]
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        after = [self.sample(name) for name in (count, hits, misses)]
+        self.assertEqual(
+            [new - old for new, old in zip(after, before)], [2, 1, 1]
+        )
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            '# TYPE yatube_http_request_duration_seconds histogram', text
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', text)
+
+    def test_histogram_buckets(self):
+        """Бакеты гистограммы накопительные и идут по возрастанию."""
+        TEST_HISTOGRAM.observe(0.5)
+        lines = [line for line in collect().splitlines()
+                 if line.startswith('yatube_test_seconds')]
+        self.assertEqual(lines, [
+            'yatube_test_seconds_bucket{le="0.1"} 0.0',
+            'yatube_test_seconds_bucket{le="1.0"} 1.0',
+            'yatube_test_seconds_bucket{le="+Inf"} 1.0',
+            'yatube_test_seconds_sum 0.5',
+            'yatube_test_seconds_count 1.0',
+        ])
+
+    def test_values_summed_across_processes(self):
+        """Значения из разных процессов складываются."""
+        name = 'yatube_test_events_total{kind="child"}'
+        before = self.sample(name)
+        TEST_COUNTER.inc(kind='child')
+        process = multiprocessing.get_context('fork').Process(
+            target=increment_in_child
+        )
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.sample(name) - before, 2)
+
+    def test_metrics_allowed_ips(self):
+        """/metrics недоступен с адресов вне METRICS_ALLOWED_IPS."""
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
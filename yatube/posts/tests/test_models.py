@@ -1,7 +1,16 @@
+from io import StringIO
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import Comment, Follow, Group, Post, UserStats
 
 User = get_user_model()
 
@@ -58,3 +67,194 @@ class PostModelTest(TestCase):
                     value,
                     f'Поле {help_text} ожидало значение {value}'
                 )
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Test group name',
+            slug='test_slug',
+            description='Test description',
+        )
+
+    def assertStats(self, user, **expected):
+        stats = UserStats.objects.get(user=user)
+        for field, value in expected.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(stats, field), value)
+
+    def test_post_counters(self):
+        '''Счётчики публикаций автора и группы'''
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group
+        )
+        self.assertStats(self.author, posts_count=1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.delete()
+        self.assertStats(self.author, posts_count=0)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_comment_counter_and_cascade(self):
+        '''Счётчик комментариев и каскадное удаление'''
+        commenter = User.objects.create_user(username='commenter')
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(post=post, author=commenter, text='1')
+        Comment.objects.create(post=post, author=commenter, text='2')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+        commenter.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        '''Счётчики подписчиков и подписок'''
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertStats(self.author, followers_count=1)
+        self.assertStats(self.user, following_count=1)
+        follow.delete()
+        self.assertStats(self.author, followers_count=0)
+        self.assertStats(self.user, following_count=0)
+
+    def test_reconcile_counters(self):
+        '''Команда reconcile_counters исправляет расхождения'''
+        post = Post.objects.create(
+            author=self.author, text='Текст', group=self.group
+        )
+        Comment.objects.create(post=post, author=self.user, text='1')
+        UserStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        Group.objects.filter(pk=self.group.pk).update(posts_count=3)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertStats(self.author, posts_count=1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class FeedIndexesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def feed_queries(self, client, url, table, **params):
+        """SQL-запросы страницы ленты к table с сортировкой и LIMIT."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        queries = [
+            query['sql'] for query in captured.captured_queries
+            if f'FROM "{table}"' in query['sql']
+            and 'ORDER BY' in query['sql'] and 'LIMIT' in query['sql']
+        ]
+        self.assertTrue(queries, f'нет запроса ленты к {table}')
+        return response, queries
+
+    def test_views_use_feed_indexes(self):
+        '''Запросы лент из view читаются по индексам без сортировки'''
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=self.user, author=author)
+        for number in range(12):
+            post = Post.objects.create(
+                author=author, group=group, text=f'Пост {number}'
+            )
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        client = Client()
+        client.force_login(self.user)
+        response, _ = self.feed_queries(
+            client, reverse('posts:index'), 'posts_post'
+        )
+        feeds = (
+            ('post_pub_date_idx', reverse('posts:index'), 'posts_post',
+             {}),
+            ('post_pub_date_idx', reverse('posts:index'), 'posts_post',
+             {'cursor': response.context['page_obj'].next_cursor}),
+            ('post_group_pub_date_idx',
+             reverse('posts:group_list', kwargs={'slug': group.slug}),
+             'posts_post', {}),
+            ('post_author_pub_date_idx',
+             reverse('posts:profile', kwargs={'username': author}),
+             'posts_post', {}),
+            ('timeline_user_pub_date_idx', reverse('posts:follow_index'),
+             'posts_timeline', {}),
+            ('comment_post_created_idx',
+             reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+             'posts_comment', {}),
+        )
+        for index, url, table, params in feeds:
+            with self.subTest(url=url, params=params):
+                _, queries = self.feed_queries(client, url, table, **params)
+                plans = [self.query_plan(sql) for sql in queries]
+                self.assertTrue(any(
+                    f'USING INDEX {index}' in plan
+                    or f'USING COVERING INDEX {index}' in plan
+                    for plan in plans
+                ), plans)
+                for plan in plans:
+                    self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_follow_is_unique(self):
+        '''Повторная подписка на автора запрещена'''
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=self.user, author=author)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Follow.objects.create(user=self.user, author=author)
+
+
+class RemoveDuplicateFollowsMigrationTest(TransactionTestCase):
+    """Миграция 0015 убирает повторные подписки и пересчитывает счётчики."""
+    migrate_from = [('posts', '0014_counters')]
+    migrate_to = [('posts', '0015_feed_indexes')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        UserModel = apps.get_model('auth', 'User')
+        Follow = apps.get_model('posts', 'Follow')
+        UserStats = apps.get_model('posts', 'UserStats')
+        self.reader = UserModel.objects.create(username='reader')
+        self.author = UserModel.objects.create(username='author')
+        self.other = UserModel.objects.create(username='other')
+        for user, following in ((self.reader, 3), (self.other, 1)):
+            UserStats.objects.create(user=user, following_count=following)
+        UserStats.objects.create(user=self.author, followers_count=4)
+        for _ in range(3):
+            Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_removed(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        Follow = apps.get_model('posts', 'Follow')
+        UserStats = apps.get_model('posts', 'UserStats')
+        self.assertEqual(
+            Follow.objects.filter(author_id=self.author.pk).count(), 2
+        )
+        stats = {
+            row.user_id: row for row in UserStats.objects.all()
+        }
+        self.assertEqual(stats[self.author.pk].followers_count, 2)
+        self.assertEqual(stats[self.reader.pk].following_count, 1)
+        self.assertEqual(stats[self.other.pk].following_count, 1)
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import query_budget
+
+User = get_user_model()
+
+
+class QueryBudgetTests(TestCase):
+    """Количество SQL-запросов страниц не зависит от числа записей."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'author{number}',
+                first_name='Имя',
+                last_name=f'Фамилия {number}'
+            )
+            for number in range(5)
+        ]
+        for number in range(15):
+            Post.objects.create(
+                title=f'Пост {number}',
+                text=f'Тестовый текст {number}',
+                author=authors[number % len(authors)],
+                group=cls.group
+            )
+        cls.post = Post.objects.first()
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post,
+                author=authors[number],
+                text=f'Комментарий {number}'
+            )
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.author = authors[0]
+        index = reverse('posts:index')
+        group_list = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        profile = reverse(
+            'posts:profile', kwargs={'username': cls.author.username}
+        )
+        post_detail = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.pk}
+        )
+        post_comments = reverse(
+            'posts:post_comments', kwargs={'post_id': cls.post.pk}
+        )
+        # Валидатор ETag добавляет по запросу группе, профилю и посту.
+        cls.guest_budgets = {
+            index: 1,
+            group_list: 3,
+            profile: 3,
+            post_detail: 3,
+            post_comments: 2,
+        }
+        # Сессия и пользователь добавляют по одному запросу,
+        # профиль ещё раз проверяет подписку в валидаторе.
+        cls.authorized_budgets = {
+            index: 3,
+            group_list: 5,
+            profile: 7,
+            post_detail: 5,
+            reverse('posts:follow_index'): 3,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_guest_pages_query_budget(self):
+        """Страницы для гостя укладываются в бюджет запросов."""
+        for url, budget in self.guest_budgets.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with query_budget(budget):
+                    self.guest_client.get(url)
+
+    def test_authorized_pages_query_budget(self):
+        """Страницы пользователя укладываются в бюджет запросов."""
+        for url, budget in self.authorized_budgets.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with query_budget(budget):
+                    self.authorized_client.get(url)
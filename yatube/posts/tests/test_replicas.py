@@ -0,0 +1,105 @@
+import time
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import (RequestFactory, SimpleTestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from about.views import AboutAuthorView
+from core.db.routers import PrimaryReplicaRouter
+from core.middleware import ReplicaMiddleware
+
+from ..api import index as api_index
+from ..models import Post
+from ..views import index
+
+about = AboutAuthorView.as_view()
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+    """Выбор базы для чтения: реплика или основная."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def call(self, request, view, write=False):
+        """Пропускает запрос через ReplicaMiddleware и возвращает базу,
+        выбранную для чтения во время view, и ответ."""
+        chosen = []
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            chosen.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(get_response)
+        response = middleware(request)
+        return chosen[0], response
+
+    def test_posts_pages_read_from_replica(self):
+        """GET страниц и API posts читается с реплики."""
+        for view in (index, api_index):
+            with self.subTest(view=view.__name__):
+                db, response = self.call(self.factory.get('/'), view)
+                self.assertEqual(db, 'replica')
+                self.assertNotIn('primary_until', response.cookies)
+
+    def test_other_requests_read_from_primary(self):
+        """Другие приложения и запросы с записью читают основную базу."""
+        for request, view in (
+            (self.factory.get('/'), about),
+            (self.factory.post('/'), index),
+        ):
+            with self.subTest(method=request.method, view=view.__name__):
+                db, _ = self.call(request, view)
+                self.assertEqual(db, 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_sticks_to_primary(self):
+        """После записи клиент читает основную базу, пока не истечёт окно."""
+        _, response = self.call(self.factory.post('/'), about, write=True)
+        cookie = response.cookies['primary_until']
+        self.assertEqual(cookie['max-age'], 10)
+        request = self.factory.get('/')
+        request.COOKIES['primary_until'] = cookie.value
+        db, _ = self.call(request, index)
+        self.assertEqual(db, 'default')
+        request.COOKIES['primary_until'] = str(int(time.time()) - 1)
+        db, _ = self.call(request, index)
+        self.assertEqual(db, 'replica')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        """Без реплик всё читается из основной базы."""
+        db, _ = self.call(self.factory.get('/'), index)
+        self.assertEqual(db, 'default')
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class StreamedFeedReplicaTests(TransactionTestCase):
+    """Лента API читается с реплики, хотя ответ отдаётся потоком."""
+
+    def test_streamed_page_reads_from_replica(self):
+        chosen = []
+        db_for_read = PrimaryReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            if model is Post:
+                chosen.append(db_for_read(router, model, **hints))
+            # Реплики в тестах нет: запрос всё равно выполняет основная база.
+            return DEFAULT_DB_ALIAS
+
+        with mock.patch.object(
+            PrimaryReplicaRouter, 'db_for_read', autospec=True,
+            side_effect=record
+        ):
+            response = self.client.get(reverse('api:index'))
+            self.assertTrue(response.streaming)
+            b''.join(response.streaming_content)
+        self.assertEqual(chosen, ['replica'])
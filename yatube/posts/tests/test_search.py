@@ -0,0 +1,132 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import (FTS_TABLE, FTS_TRIGGERS, filter_posts, fts_query,
+                      missing_fts_triggers, search_ids)
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 есть только в SQLite')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.cat_post = Post.objects.create(
+            author=cls.user,
+            title='Кошки',
+            text='Рассказ про кошек и котят'
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user,
+            title='Собаки',
+            text='Рассказ про собак'
+        )
+        for number in range(12):
+            Post.objects.create(
+                author=cls.user,
+                title=f'Заметка {number}',
+                text='Общий текст заметки'
+            )
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def test_search_finds_title_and_text(self):
+        """Поиск находит посты по заголовку и тексту."""
+        response = self.search('кошки')
+        self.assertEqual(list(response.context['page_obj']), [self.cat_post])
+        response = self.search('собак')
+        self.assertEqual(list(response.context['page_obj']), [self.dog_post])
+
+    def test_search_index_follows_edits(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.dog_post.text = 'Теперь про попугаев'
+        self.dog_post.save()
+        self.assertEqual(
+            [pk for _, pk in search_ids('попугаев')], [self.dog_post.pk]
+        )
+        self.assertEqual(
+            [pk for _, pk in search_ids('рассказ')], [self.cat_post.pk]
+        )
+        self.dog_post.delete()
+        self.assertEqual(search_ids('попугаев'), [])
+
+    def test_search_cursor_pagination(self):
+        """Результаты поиска листаются курсором без повторов."""
+        first = self.search('заметки').context['page_obj']
+        self.assertEqual(len(first), 10)
+        second = self.search(
+            'заметки', cursor=first.next_cursor
+        ).context['page_obj']
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertFalse(set(first) & set(second))
+
+    def test_last_page_links_to_first(self):
+        """На последней странице поиска есть ссылка на первую."""
+        first = self.search('заметки').context['page_obj']
+        response = self.search('заметки', cursor=first.next_cursor)
+        self.assertFalse(response.context['page_obj'].has_next())
+        self.assertContains(response, 'Первая')
+
+    def test_filter_posts_uses_subquery(self):
+        """Фильтр по индексу — один подзапрос, а не список id."""
+        queryset = filter_posts(Post.objects.all(), 'заметки')
+        sql, params = queryset.query.sql_with_params()
+        self.assertIn('MATCH %s', sql)
+        self.assertEqual(params, (fts_query('заметки'),))
+        self.assertEqual(queryset.count(), 12)
+        self.assertFalse(filter_posts(Post.objects.all(), '  !').exists())
+
+    def test_special_characters_are_safe(self):
+        """Спецсимволы FTS5 в запросе не ломают поиск."""
+        response = self.search('"кошки" OR NEAR(* -')
+        self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_search_index(self):
+        """Команда пересобирает индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('delete-all')"
+            )
+        self.assertEqual(search_ids('кошки'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            [pk for _, pk in search_ids('кошки')], [self.cat_post.pk]
+        )
+
+    def test_triggers_exist_after_migrations(self):
+        """Миграции не теряют триггеры поискового индекса."""
+        self.assertEqual(missing_fts_triggers(), [])
+
+    def test_rebuild_requires_triggers(self):
+        """Без триггеров команда сообщает об ошибке."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {FTS_TRIGGERS[0]}')
+        self.assertEqual(missing_fts_triggers(), [FTS_TRIGGERS[0]])
+        with self.assertRaises(CommandError):
+            call_command('rebuild_search_index', stdout=StringIO())
+
+    def test_admin_uses_search_index(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        admin_model = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/', {'q': 'котят'})
+        queryset, _ = admin_model.get_search_results(
+            request, Post.objects.all(), 'котят'
+        )
+        self.assertEqual(list(queryset), [self.cat_post])
@@ -0,0 +1,52 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_has_header_and_log(self):
+        """Замеренный запрос отдаёт Server-Timing и пишет строку в лог."""
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            with self.assertNumQueries(3):
+                response = self.client.get(self.url)
+        header = response['Server-Timing']
+        for metric in ('db', 'tpl', 'view', 'total'):
+            self.assertRegex(header, rf'\b{metric};dur=\d+\.\d')
+        self.assertIn('sql;desc="3 queries"', header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], 3)
+        total = float(re.search(r'total;dur=([\d.]+)', header).group(1))
+        self.assertGreater(record['tpl_ms'], 0)
+        self.assertLessEqual(record['tpl_ms'], total)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        """Запрос вне выборки проходит без замеров."""
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,138 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase, override_settings
+
+from core.db.backends.sqlite3.base import _write_lock
+
+ALIAS = 'sqlite_file'
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """Бэкенд core.db.backends.sqlite3 на базе в файле."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.path = os.path.join(self.directory, 'test.sqlite3')
+        connections.databases[ALIAS] = {
+            **connections.databases['default'],
+            'ENGINE': 'core.db.backends.sqlite3',
+            'NAME': self.path,
+        }
+        self.cursor().execute(
+            'CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)'
+        )
+
+    def tearDown(self):
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.databases[ALIAS]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def cursor(self):
+        return connections[ALIAS].cursor()
+
+    def pragma(self, name):
+        cursor = self.cursor()
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+    def count(self):
+        cursor = self.cursor()
+        cursor.execute('SELECT count(*) FROM item')
+        return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """При подключении включаются WAL и PRAGMA из настроек."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(
+            self.pragma('busy_timeout'),
+            settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+
+    def test_atomic_takes_write_lock(self):
+        """atomic сразу занимает базу на запись, потоки ждут по очереди."""
+        events = []
+
+        def write(name):
+            with transaction.atomic(using=ALIAS):
+                events.append(f'{name} start')
+                time.sleep(0.05)
+                self.cursor().execute(
+                    'INSERT INTO item (name) VALUES (%s)', [name]
+                )
+                events.append(f'{name} end')
+            connections[ALIAS].close()
+
+        threads = [
+            threading.Thread(target=write, args=(name,))
+            for name in ('a', 'b', 'c')
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for start, end in zip(events[::2], events[1::2]):
+            self.assertEqual(start.split()[0], end.split()[0])
+        self.assertEqual(self.count(), 3)
+
+    @override_settings(
+        SQLITE_PRAGMAS={'journal_mode': 'WAL', 'busy_timeout': 0},
+        SQLITE_LOCK_RETRIES=3
+    )
+    def test_retry_when_locked(self):
+        """Запрос вне транзакции повторяется, пока база занята."""
+        connections[ALIAS].close()
+        raw = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        raw.execute('BEGIN IMMEDIATE')
+        threading.Timer(0.1, raw.execute, ['COMMIT']).start()
+        self.cursor().execute('INSERT INTO item (name) VALUES (%s)', ['x'])
+        raw.close()
+        self.assertEqual(self.count(), 1)
+
+    @override_settings(
+        SQLITE_PRAGMAS={'journal_mode': 'WAL', 'busy_timeout': 0},
+        SQLITE_LOCK_RETRIES=0
+    )
+    def test_locked_without_retries(self):
+        """Без повторов занятая база сразу даёт ошибку."""
+        connections[ALIAS].close()
+        raw = sqlite3.connect(self.path, isolation_level=None)
+        raw.execute('BEGIN IMMEDIATE')
+        try:
+            with self.assertRaisesMessage(Exception, 'database is locked'):
+                self.cursor().execute(
+                    'INSERT INTO item (name) VALUES (%s)', ['x']
+                )
+        finally:
+            raw.close()
+
+    @override_settings(
+        SQLITE_PRAGMAS={'journal_mode': 'WAL', 'busy_timeout': 50}
+    )
+    def test_atomic_fails_without_write_lock(self):
+        """Не дождавшись блокировки потока, atomic не начинается."""
+        lock = _write_lock(self.path)
+        lock.acquire()
+        try:
+            with self.assertRaisesMessage(
+                OperationalError, 'database is locked'
+            ):
+                with transaction.atomic(using=ALIAS):
+                    self.cursor().execute(
+                        'INSERT INTO item (name) VALUES (%s)', ['x']
+                    )
+        finally:
+            lock.release()
+        self.assertIsNone(connections[ALIAS].write_lock)
+        self.assertFalse(connections[ALIAS].in_atomic_block)
+        self.assertEqual(self.count(), 0)
@@ -0,0 +1,166 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+from PIL import Image
+
+from core.views import media
+
+from ..counters import delete_unused_image, reconcile_counters
+from ..models import MediaFile, Post
+from ..storage import post_images
+from .test_forms import SMALL_GIF
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def red_png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, name='small.gif', content=SMALL_GIF):
+        self.client.post(reverse('posts:post_create'), data={
+            'title': 'Заголовок',
+            'text': 'Текст',
+            'image': SimpleUploadedFile(name, content, 'image/gif'),
+        })
+        return Post.objects.first()
+
+    def refs(self, name):
+        return MediaFile.objects.get(name=name).refs
+
+    def test_name_from_content(self):
+        """Одинаковое содержимое сохраняется один раз под именем из хэша."""
+        first = post_images.save('posts/a.txt', ContentFile(b'data'))
+        second = post_images.save('posts/b.TXT', ContentFile(b'data'))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.txt$')
+        self.assertEqual(
+            os.listdir(os.path.dirname(post_images.path(first))),
+            [os.path.basename(first)]
+        )
+
+    def test_concurrent_save_of_same_content(self):
+        """Файл, появившийся после проверки exists, не зацикливает save."""
+        first = post_images.save('posts/a.txt', ContentFile(b'race'))
+        with mock.patch.object(post_images, 'exists', return_value=False):
+            second = post_images.save('posts/b.txt', ContentFile(b'race'))
+        self.assertEqual(first, second)
+        with post_images.open(second) as file:
+            self.assertEqual(file.read(), b'race')
+        self.assertEqual(
+            os.listdir(os.path.dirname(post_images.path(first))),
+            [os.path.basename(first)]
+        )
+
+    def test_refs_follow_create_edit_delete(self):
+        """Счётчик ссылок меняется при создании, правке и удалении постов."""
+        first = self.upload('one.gif')
+        second = self.upload('two.gif')
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(self.refs(name), 2)
+        first.delete()
+        self.assertEqual(self.refs(name), 1)
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': second.pk}),
+            data={
+                'title': 'Заголовок',
+                'text': 'Текст',
+                'image': SimpleUploadedFile(
+                    'other.png', red_png(), 'image/png'
+                ),
+            }
+        )
+        second.refresh_from_db()
+        self.assertNotEqual(second.image.name, name)
+        self.assertEqual(self.refs(name), 0)
+        self.assertEqual(self.refs(second.image.name), 1)
+
+    def test_unused_file_is_deleted(self):
+        """Файл без ссылок удаляется, файл со ссылками остаётся."""
+        post = self.upload()
+        name = post.image.name
+        delete_unused_image(name)
+        self.assertTrue(post_images.exists(name))
+        post.delete()
+        self.assertEqual(self.refs(name), 0)
+        delete_unused_image(name)
+        self.assertFalse(post_images.exists(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+
+    def test_reconcile(self):
+        """reconcile_counters восстанавливает потерянные счётчики ссылок."""
+        post = self.upload()
+        MediaFile.objects.all().delete()
+        self.assertEqual(reconcile_counters()['MediaFile.refs'], 1)
+        self.assertEqual(self.refs(post.image.name), 1)
+
+    def test_immutable_cache_headers(self):
+        """Файлы с именем из хэша отдаются с Cache-Control: immutable."""
+        name = self.upload().image.name
+        legacy = post_images.save('posts/legacy.txt', ContentFile(b'x'))
+        os.rename(
+            post_images.path(legacy),
+            os.path.join(TEMP_MEDIA_ROOT, 'posts', 'legacy.txt')
+        )
+        request = RequestFactory().get('/')
+        response = media(request, name)
+        self.assertIn('immutable', response['Cache-Control'])
+        response = media(request, 'posts/legacy.txt')
+        self.assertFalse(response.has_header('Cache-Control'))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageRefsLockTests(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_exists_check_and_refs_share_transaction(self):
+        """Проверка файла и рост refs не разделены фиксацией транзакции."""
+        user = User.objects.create_user(username='author')
+        in_transaction = []
+        exists = post_images.exists
+
+        def record(name):
+            in_transaction.append(connection.in_atomic_block)
+            return exists(name)
+
+        with mock.patch.object(post_images, 'exists', side_effect=record):
+            post = Post.objects.create(
+                author=user,
+                text='Текст',
+                image=SimpleUploadedFile('small.gif', SMALL_GIF)
+            )
+        self.assertEqual(in_transaction, [True])
+        self.assertEqual(MediaFile.objects.get(name=post.image.name).refs, 1)
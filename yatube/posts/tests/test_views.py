@@ -1,15 +1,21 @@
 import shutil
 import tempfile
+import time
+from io import StringIO
+from unittest import mock, skipIf
 
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post
+from ..feed_cache import bump_feed_version, feed_version
+from ..models import Comment, Follow, Group, Post, Timeline
+from ..utils import CursorPaginator
 
 User = get_user_model()
 
@@ -136,19 +142,52 @@ class ViewTests(TestCase):
 
     def test_cache_context(self):
         '''Проверка кэширования страницы index'''
+        cache.clear()
         before_create_post = self.authorized_client.get(
             reverse('posts:index'))
         first_item_before = before_create_post.content
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        after_update = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(after_update.content, first_item_before)
+        cache.clear()
+        after_clear = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotEqual(after_update.content, after_clear.content)
+
+    def test_cache_invalidated_by_new_post(self):
+        '''Новый пост сразу сбрасывает кэш лент'''
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for page in pages:
+            self.authorized_client.get(page)
         Post.objects.create(
             author=self.user,
-            text='Тестовый пост',
+            title='Свежий заголовок',
+            text='Свежий пост',
             group=self.group)
-        after_create_post = self.authorized_client.get(reverse('posts:index'))
-        first_item_after = after_create_post.content
-        self.assertEqual(first_item_after, first_item_before)
-        cache.clear()
-        after_clear = self.authorized_client.get(reverse('posts:index'))
-        self.assertNotEqual(first_item_after, after_clear)
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertContains(response, 'Свежий заголовок')
+
+    @skipIf(settings.SHARED_CACHE, 'версии лент в общем кэше не истекают')
+    def test_feed_version_expires_in_other_worker(self):
+        '''Без общего кэша другой воркер отстаёт не дольше TTL версии'''
+        other_worker = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'other-worker',
+        }})
+        with other_worker:
+            cache.clear()
+            stale = feed_version('index')
+        bump_feed_version('index')
+        with other_worker:
+            self.assertEqual(feed_version('index'), stale)
+        later = time.time() + settings.FEED_VERSION_TIMEOUT + 1
+        with other_worker, mock.patch('time.time', return_value=later):
+            self.assertNotEqual(feed_version('index'), stale)
 
     def test_follow_author(self):
         """Тестирование на добавление автора в подписки"""
@@ -233,6 +272,14 @@ class PostViewsPaginatorTests(TestCase):
             'slug': f'{self.group.slug}'
         })
 
+    def test_cached_pages_differ(self):
+        """Кэш ленты различает страницы."""
+        for page in (self.index, self.profile, self.group_list):
+            with self.subTest(page=page):
+                first = self.authorized_client.get(page + '?page=1')
+                second = self.authorized_client.get(page + '?page=2')
+                self.assertNotEqual(first.content, second.content)
+
     def test_views_paginator(self):
         """Проверка работы пагинатора на необходимых страницах"""
         pages = [self.index, self.profile, self.group_list]
@@ -250,3 +297,266 @@ class PostViewsPaginatorTests(TestCase):
                     len(response2.context['page_obj']),
                     second_page_count
                 )
+
+
+class PostViewsCursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.posts_count = 25
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый текст {number}', author=cls.user)
+            for number in range(cls.posts_count)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.index = reverse('posts:index')
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Курсорная пагинация проходит все посты без повторов."""
+        seen = []
+        response = self.client.get(self.index)
+        while True:
+            page_obj = response.context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            response = self.client.get(
+                self.index, {'cursor': page_obj.next_cursor}
+            )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_cursor_previous_page(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        first = self.client.get(self.index).context['page_obj']
+        second = self.client.get(
+            self.index, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            self.index, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.client.get(self.index, {'cursor': 'broken'})
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_cursor_mode_does_not_count(self):
+        """Курсорная страница выполняется одним запросом без COUNT."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        next_cursor = paginator.get_page(None).next_cursor
+        with self.assertNumQueries(1) as queries:
+            second = paginator.get_page(next_cursor)
+            self.assertEqual(len(second), 10)
+        sql = queries.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+
+@override_settings(COMMENTS_ON_PAGE=3)
+class PostCommentsPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.post = Post.objects.create(text='Тестовый текст', author=cls.user)
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                text=f'Комментарий {number}'
+            )
+            for number in range(7)
+        ]
+
+    def setUp(self):
+        self.client = Client()
+        self.post_detail = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.post_comments = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_post_detail_shows_first_comments_page(self):
+        """На странице поста выводится первая страница комментариев."""
+        response = self.client.get(self.post_detail)
+        comments = response.context['comments']
+        self.assertEqual(list(comments), self.comments[:-4:-1])
+        self.assertContains(
+            response, f'{self.post_comments}?cursor={comments.next_cursor}'
+        )
+
+    def test_comment_fragments_cover_all_comments(self):
+        """Фрагменты комментариев проходят все комментарии без повторов."""
+        comments = self.client.get(self.post_detail).context['comments']
+        seen = list(comments)
+        while comments.has_next():
+            response = self.client.get(
+                self.post_comments, {'cursor': comments.next_cursor}
+            )
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html'
+            )
+            self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+            comments = response.context['comments']
+            seen.extend(comments)
+        self.assertEqual(seen, self.comments[::-1])
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_comment_fragment_unknown_post(self):
+        """Фрагмент комментариев несуществующего поста возвращает 404."""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(TIMELINE_LENGTH=3)
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Старый пост',
+        )
+
+    def setUp(self):
+        self.follower_client = Client()
+        self.follower_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def follow(self):
+        self.follower_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+
+    def create_post(self, text):
+        self.author_client.post(
+            reverse('posts:post_create'),
+            data={'title': 'Заголовок', 'text': text}
+        )
+        return Post.objects.get(text=text)
+
+    def test_follow_backfills_timeline(self):
+        """Подписка добавляет старые посты автора в ленту."""
+        self.follow()
+        self.assertTrue(Timeline.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+
+    def test_post_create_fans_out(self):
+        """Новый пост попадает в ленту подписчика."""
+        self.follow()
+        post = self.create_post('Новый пост')
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'][0], post)
+
+    def test_unfollow_prunes_timeline(self):
+        """Отписка удаляет посты автора из ленты."""
+        self.follow()
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+
+    def test_timeline_length_is_capped(self):
+        """Длина ленты ограничена TIMELINE_LENGTH."""
+        self.follow()
+        for number in range(5):
+            self.create_post(f'Пост {number}')
+        self.assertEqual(Timeline.objects.filter(user=self.user).count(), 3)
+        self.assertFalse(Timeline.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+
+    def test_rebuild_timelines_command(self):
+        """Команда rebuild_timelines восстанавливает ленту."""
+        Follow.objects.create(user=self.user, author=self.author)
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertTrue(Timeline.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group
+        )
+        cls.pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        for page in self.pages:
+            with self.subTest(page=page):
+                etag = self.guest_client.get(page)['ETag']
+                response = self.guest_client.get(
+                    page, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_index_skips_queries(self):
+        """Ответ 304 для главной не обращается к базе."""
+        etag = self.guest_client.get(reverse('posts:index'))['ETag']
+        with self.assertNumQueries(0):
+            self.guest_client.get(
+                reverse('posts:index'), HTTP_IF_NONE_MATCH=etag
+            )
+
+    def test_etag_changes_with_content(self):
+        """ETag меняется после новой публикации и комментария."""
+        etags = {page: self.guest_client.get(page)['ETag']
+                 for page in self.pages}
+        Post.objects.create(author=self.user, text='Новый', group=self.group)
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        for page, etag in etags.items():
+            with self.subTest(page=page):
+                response = self.guest_client.get(
+                    page, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        """Гость и пользователь получают разные ETag."""
+        for page in self.pages:
+            with self.subTest(page=page):
+                self.assertNotEqual(
+                    self.guest_client.get(page)['ETag'],
+                    self.authorized_client.get(page)['ETag']
+                )
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from django.urls import get_resolver
+
+from core.warmup import warm_up
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class WarmUpTests(SimpleTestCase):
+    def test_warm_up(self):
+        """Прогрев заполняет кэш шаблонов и строит резолвер URL."""
+        with self.assertLogs('yatube.warmup', 'INFO'):
+            result = warm_up()
+        self.assertEqual(result['errors'], [])
+        self.assertGreater(result['urls'], 0)
+        loader = engines['django'].engine.template_loaders[0]
+        cached = set(loader.get_template_cache)
+        for name in ('posts/index.html', 'includes/header.html',
+                     'users/login.html', 'admin/base.html'):
+            self.assertIn(name, cached)
+        self.assertEqual(len(cached), result['templates'])
+        self.assertTrue(get_resolver()._populated)
@@ -0,0 +1,53 @@
+import logging
+import time
+
+from django.db import close_old_connections
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import task
+from core.metrics import THUMBNAIL_DURATION
+
+from .storage import post_images
+
+logger = logging.getLogger(__name__)
+
+# Размеры миниатюр, которые используют шаблоны постов
+# ({% thumbnail post.image "960x400" crop="center" upscale=True %}).
+POST_THUMBNAILS = (
+    ('960x400', {'crop': 'center', 'upscale': True}),
+)
+
+
+def generate_thumbnails(image_name):
+    """Создаёт миниатюры изображения и возвращает True при успехе."""
+    started = time.perf_counter()
+    try:
+        # Ключ миниатюры зависит от хранилища: строка попала бы в
+        # default_storage, и шаблон с post.image не нашёл бы её.
+        image = ImageFile(image_name, post_images)
+        for geometry, options in POST_THUMBNAILS:
+            get_thumbnail(image, geometry, **options)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', image_name)
+        THUMBNAIL_DURATION.observe(
+            time.perf_counter() - started, result='error'
+        )
+        return False
+    finally:
+        close_old_connections()
+    THUMBNAIL_DURATION.observe(time.perf_counter() - started, result='ok')
+    return True
+
+
+@task(max_attempts=3)
+def make_thumbnails(image_name):
+    if not generate_thumbnails(image_name):
+        raise RuntimeError(f'Миниатюры для {image_name} не созданы')
+
+
+def schedule_thumbnails(image_name):
+    """Ставит создание миниатюр в очередь после фиксации транзакции."""
+    make_thumbnails.enqueue_on_commit(
+        image_name, key=f'thumbnails:{image_name}'
+    )
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import Follow, Post, Timeline
+
+BATCH_SIZE: int = 500
+
+
+def trim_timelines(user_ids):
+    length = settings.TIMELINE_LENGTH
+    boundary = Timeline.objects.filter(
+        user=OuterRef('user')
+    ).values('pub_date')[length:length + 1]
+    Timeline.objects.filter(
+        user__in=list(user_ids),
+        pub_date__lte=Subquery(boundary)
+    ).delete()
+
+
+def fan_out_post(post):
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id)
+        .values_list('user_id', flat=True)
+    )
+    if not follower_ids:
+        return
+    Timeline.objects.bulk_create(
+        (Timeline(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in follower_ids),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    trim_timelines(follower_ids)
+
+
+def backfill_timeline(user, author):
+    posts = Post.objects.filter(author=author).values_list(
+        'pk', 'pub_date'
+    )[:settings.TIMELINE_LENGTH]
+    Timeline.objects.bulk_create(
+        (Timeline(user=user, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    trim_timelines([user.pk])
+
+
+def prune_timeline(user, author):
+    Timeline.objects.filter(user=user, post__author=author).delete()
+
+
+def rebuild_timeline(user):
+    Timeline.objects.filter(user=user).delete()
+    posts = Post.objects.filter(
+        author__following__user=user
+    ).distinct().values_list('pk', 'pub_date')[:settings.TIMELINE_LENGTH]
+    Timeline.objects.bulk_create(
+        (Timeline(user=user, post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
@@ -1,7 +1,171 @@
-from django.core.paginator import Paginator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import partial
 
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def paginator_posts(request, posts, post_per_page=10):
-    paginator = Paginator(posts, post_per_page)
+from .models import Comment
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+CURSOR_SEPARATOR = '|'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    raw = CURSOR_SEPARATOR.join((direction, value.isoformat(), str(pk)))
+    return urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = urlsafe_b64decode(cursor.encode()).decode()
+        direction, value, pk = raw.split(CURSOR_SEPARATOR)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        raise InvalidCursor(cursor)
+    if value is None or direction not in (CURSOR_NEXT, CURSOR_PREVIOUS):
+        raise InvalidCursor(cursor)
+    return direction, value, pk
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации; запрос выполняется при первом чтении."""
+
+    def __init__(self, paginator, fetch):
+        self.paginator = paginator
+        self.number = None
+        self._fetch = fetch
+
+    def _load(self):
+        if self._fetch is not None:
+            fetch, self._fetch = self._fetch, None
+            (self._object_list,
+             self._next_cursor,
+             self._previous_cursor) = fetch()
+
+    def load(self):
+        """Выполняет запрос страницы сразу, а не при первом чтении."""
+        self._load()
+        return self
+
+    @property
+    def object_list(self):
+        self._load()
+        return self._object_list
+
+    @object_list.setter
+    def object_list(self, value):
+        self._load()
+        self._object_list = value
+
+    @property
+    def next_cursor(self):
+        self._load()
+        return self._next_cursor
+
+    @property
+    def previous_cursor(self):
+        self._load()
+        return self._previous_cursor
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (date_field, pk_field) без COUNT и OFFSET."""
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, date_field='pub_date',
+                 pk_field='pk'):
+        self.date_field = date_field
+        self.pk_field = pk_field
+        super().__init__(
+            object_list.order_by(f'-{date_field}', f'-{pk_field}'), per_page
+        )
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor):
+        if not cursor:
+            return CursorPage(self, self._fetch_first)
+        return CursorPage(self, partial(self._fetch, *decode_cursor(cursor)))
+
+    def _fetch_first(self):
+        objects = list(self.object_list[:self.per_page + 1])
+        return self._build_page(objects, False, False)
+
+    def _fetch(self, direction, value, pk):
+        date_field, pk_field = self.date_field, self.pk_field
+        if direction == CURSOR_NEXT:
+            objects = list(self.object_list.filter(
+                Q(**{f'{date_field}__lt': value})
+                | Q(**{date_field: value, f'{pk_field}__lt': pk})
+            )[:self.per_page + 1])
+            return self._build_page(objects, False, True)
+        objects = list(self.object_list.filter(
+            Q(**{f'{date_field}__gt': value})
+            | Q(**{date_field: value, f'{pk_field}__gt': pk})
+        ).order_by(date_field, pk_field)[:self.per_page + 1])
+        return self._build_page(objects, True, True)
+
+    def _build_page(self, objects, reverse, from_cursor):
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if reverse:
+            objects.reverse()
+            has_next, has_previous = from_cursor, has_more
+        else:
+            has_next, has_previous = has_more, from_cursor
+        next_cursor = previous_cursor = None
+        if has_next and objects:
+            next_cursor = self._cursor(CURSOR_NEXT, objects[-1])
+        if has_previous and objects:
+            previous_cursor = self._cursor(CURSOR_PREVIOUS, objects[0])
+        return objects, next_cursor, previous_cursor
+
+    def _cursor(self, direction, obj):
+        if isinstance(obj, dict):
+            return encode_cursor(
+                direction, obj[self.date_field], obj[self.pk_field]
+            )
+        return encode_cursor(
+            direction,
+            getattr(obj, self.date_field),
+            getattr(obj, self.pk_field),
+        )
+
+
+def paginator_posts(request, posts, post_per_page=10, **cursor_options):
     num_page = request.GET.get('page')
-    return paginator.get_page(num_page)
+    if settings.PAGINATION_MODE == 'page' or num_page is not None:
+        paginator = Paginator(posts, post_per_page)
+        return paginator.get_page(num_page)
+    paginator = CursorPaginator(posts, post_per_page, **cursor_options)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def paginator_comments(request, post_id):
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.COMMENTS_ON_PAGE,
+        date_field='created'
+    )
+    return paginator.get_page(request.GET.get('cursor'))
@@ -1,52 +1,127 @@
+from functools import partial
+
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.views.decorators.http import condition
+
+from .concurrency import gather
+from .counters import change_group_counter, change_image_refs
+from .etags import (group_posts_etag, index_etag, post_detail_etag,
+                    profile_etag)
+from .exporter import COLUMNS, FORMATS, export_stream
+from .feed_cache import (bump_feed_version, feed_cache, group_scope,
+                         profile_scope)
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
-from .utils import paginator_posts
+from .models import Group, Post, User, Follow, Timeline
+from .search import search_page
+from .timeline import backfill_timeline, fan_out_post, prune_timeline
+from .utils import paginator_comments, paginator_posts
 
 FILTER_POSTS = None
 
 
+@condition(etag_func=index_etag)
 def index(request):
-    posts = Post.objects.all()[:FILTER_POSTS]
+    posts = Post.objects.select_related('author', 'group')[:FILTER_POSTS]
     page_obj = paginator_posts(request, posts)
     context = {
         'page_obj': page_obj,
+        'feed_cache': feed_cache(request, 'index'),
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=group_posts_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:FILTER_POSTS]
+    posts = group.posts.select_related('author', 'group')[:FILTER_POSTS]
     page_obj = paginator_posts(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache': feed_cache(request, group_scope(group.pk)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def _is_following(user, username):
+    return (user.is_authenticated
+            and Follow.objects.filter(
+                user=user, author__username=username).exists())
+
+
+@condition(etag_func=profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
+    author, following = gather(
+        partial(
+            get_object_or_404,
+            User.objects.select_related('stats'),
+            username=username
+        ),
+        partial(_is_following, request.user, username),
+    )
     posts = author.posts.select_related('group').all()
     page_obj = paginator_posts(request, posts)
-    following = (request.user.is_authenticated
-                 and Follow.objects.filter(
-                     user=request.user,
-                     author=author).exists())
     context = {
         'page_obj': page_obj,
         'author': author,
-        'following': following}
+        'following': following,
+        'feed_cache': feed_cache(request, profile_scope(author.pk))}
     return render(request, template, context)
 
 
+def _export(request, name, **lookup):
+    kind = request.GET.get('kind', 'posts')
+    format = request.GET.get('format', 'ndjson')
+    if kind not in COLUMNS or format not in FORMATS:
+        return HttpResponseBadRequest('Неизвестный тип или формат выгрузки')
+    response = StreamingHttpResponse(
+        export_stream(kind, format, **lookup),
+        content_type=(
+            'text/csv' if format == 'csv' else 'application/x-ndjson'
+        )
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}-{kind}.{format}"'
+    )
+    return response
+
+
+@login_required
+def group_export(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _export(request, group.slug, group=group)
+
+
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    return _export(request, author.username, author=author)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = search_page(query, request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@condition(etag_func=post_detail_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post, comments = gather(
+        partial(
+            get_object_or_404,
+            Post.objects.select_related('author', 'group'),
+            pk=post_id
+        ),
+        lambda: paginator_comments(request, post_id).load(),
+    )
     form = CommentForm()
     context = {
         'post': post,
@@ -56,6 +131,15 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': paginator_comments(request, post_id),
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -63,9 +147,10 @@ def post_create(request):
         files=request.FILES or None,
     )
     if form.is_valid():
-        post = form.save(commit=False)
-        post.author = request.user
-        post.save()
+        form.instance.author = request.user
+        with transaction.atomic():
+            post = form.save()
+            fan_out_post(post)
         return redirect('posts:profile', request.user)
     context = {
         'form': form,
@@ -78,13 +163,24 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
+    old_group_id = post.group_id
+    old_image = post.image.name
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
     if form.is_valid():
-        post = form.save()
+        with transaction.atomic():
+            post = form.save()
+            if post.group_id != old_group_id:
+                change_group_counter(old_group_id, -1)
+                change_group_counter(post.group_id, 1)
+            if post.image.name != old_image:
+                change_image_refs(old_image, -1)
+                change_image_refs(post.image.name, 1)
+        if post.group_id != old_group_id:
+            bump_feed_version(group_scope(old_group_id))
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -102,16 +198,18 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
-    page_obj = paginator_posts(request, posts)
+    entries = Timeline.objects.filter(
+        user=request.user
+    ).select_related('post__author', 'post__group')
+    page_obj = paginator_posts(request, entries, pk_field='post_id')
+    page_obj.object_list = [entry.post for entry in page_obj]
     context = {
         'page_obj': page_obj,
     }
@@ -123,12 +221,19 @@ def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if user != author:
-        Follow.objects.get_or_create(user=user, author=author)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                user=user, author=author
+            )
+            if created:
+                backfill_timeline(user, author)
     return redirect('posts:profile', username=author)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user, author=author).delete()
+        prune_timeline(request.user, author)
     return redirect('posts:profile', username=username)
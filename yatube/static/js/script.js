@@ -11,4 +11,15 @@ function scrollFunction() {
 function topFunction() {
     document.body.scrollTop = 0;
     document.documentElement.scrollTop = 0;
-}
\ No newline at end of file
+}
+
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('.load-comments');
+    if (!button) {
+        return;
+    }
+    event.preventDefault();
+    fetch(button.dataset.fragmentUrl)
+        .then(function(response) { return response.text(); })
+        .then(function(html) { button.outerHTML = html; });
+});
@@ -0,0 +1,27 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 has no native ASGI handler, so the WSGI handler is served from
+a thread pool of ``ASGI_THREADS`` workers (see ``core.asgi.WsgiToAsgi``).
+Run it with any ASGI server, e.g. ``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(
+    get_wsgi_application(), max_workers=settings.ASGI_THREADS
+)
+
+if settings.WARM_START:
+    from core.warmup import warm_up
+
+    warm_up()
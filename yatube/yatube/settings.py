@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -29,11 +30,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -43,7 +47,9 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates со временем рендеринга для Server-Timing
+        'BACKEND': 'core.template.backends.timed.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,15 +64,55 @@ TEMPLATES = [
     },
 ]
 
+# Прогрев при запуске воркера (core.warmup): шаблоны компилируются
+# в кэширующий загрузчик, URL и view загружаются до первого запроса
+WARM_START = os.environ.get('YATUBE_WARM_START') == '1'
+if WARM_START:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# Реплики, с которых читаются страницы posts. Для проверки на двух файлах
+# SQLite: YATUBE_REPLICA_DB=путь и manage.py sync_replica после записей
+REPLICA_DATABASES = []
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append('replica')
+
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'primary_until'
+
+# PRAGMA, которые core.db.backends.sqlite3 выполняет при подключении.
+# WAL позволяет читать во время записи, busy_timeout — в миллисекундах
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+# Повторы запроса вне транзакции, если база занята другим процессом
+SQLITE_LOCK_RETRIES = 3
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -104,12 +150,30 @@ LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь (core.mail), manage.py send_queued_mail
+# доставляет их через MAIL_QUEUE_DELIVERY_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+MAIL_QUEUE_DELIVERY_BACKEND = (
+    'django.core.mail.backends.filebased.EmailBackend'
+)
+# Попыток доставки письма; задержка перед первым повтором в секундах,
+# дальше она удваивается
+MAIL_QUEUE_MAX_ATTEMPTS = 5
+MAIL_QUEUE_RETRY_DELAY = 60
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_ON_PAGE = 10
 
+# Комментарии на странице поста; остальные подгружаются фрагментами
+COMMENTS_ON_PAGE = 20
+
+# 'cursor' — пагинация по ключу (pub_date, id), 'page' — по номеру страницы
+PAGINATION_MODE = 'cursor'
+
+# Максимальное число записей в ленте подписок одного пользователя
+TIMELINE_LENGTH = 1000
+
 NUMBER_OF_POSTS: int = 10
 LEN_OF_POSTS: int = 15
 FIRST_OF_POSTS: int = 10
@@ -120,8 +184,97 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Изображения постов называются по хэшу содержимого (posts.storage) и не
+# меняются, поэтому отдаются с Cache-Control: immutable на этот срок.
+# В продакшене такой же заголовок для /media/ выставляет веб-сервер
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Загруженные изображения уменьшаются до POST_IMAGE_MAX_SIZE по большей
+# стороне, очищаются от метаданных и перекодируются в POST_IMAGE_FORMAT
+POST_IMAGE_MAX_SIZE = 1920
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_FORMAT = 'WEBP'
+POST_IMAGE_QUALITY = 85
+
+# Фоновые задачи (core.jobs, manage.py run_jobs): попыток по умолчанию,
+# тайм-аут видимости и задержка перед первым повтором в секундах
+JOB_MAX_ATTEMPTS = 3
+JOB_VISIBILITY_TIMEOUT = 5 * 60
+JOB_RETRY_DELAY = 30
+
+# Потоки для одновременных независимых запросов страниц (0 — по очереди).
+# Каждый поток открывает своё соединение: с SQLite это медленнее, чем
+# запросы по очереди (manage.py benchmark_feeds), выигрыш — с сетевой базой.
+FEED_QUERY_WORKERS = 0
+
+# Потоки, в которых ASGI-приложение выполняет запросы (yatube/asgi.py)
+ASGI_THREADS = 16
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Кэш в памяти процесса не общий: сброс версии в одном воркере не виден
+# другим. YATUBE_CACHE_DIR включает кэш в файлах, общий для процессов
+# одной машины (каталог очищают вместе с базой)
+if os.environ.get('YATUBE_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['YATUBE_CACHE_DIR'],
+    }
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+# С общим кэшем фрагменты лент сбрасываются по версии содержимого и
+# живут долго. Без него и фрагменты, и версии (по ним же считаются ETag)
+# живут недолго: другие воркеры отстают не больше чем на это время
+FEED_CACHE_TIMEOUT = 60 * 60 if SHARED_CACHE else 20
+FEED_VERSION_TIMEOUT = None if SHARED_CACHE else FEED_CACHE_TIMEOUT
+
+# С общим кэшем сессии и пользователь запроса читаются из кэша
+# (core.auth), в базу сессии записываются сквозь кэш. Кэш в памяти
+# процесса для этого не годится: выход и смена пароля в одном воркере
+# не видны другим, поэтому без общего кэша и то и другое читается из базы
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTH_USER_CACHE_TIMEOUT = 5 * 60
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    AUTH_USER_CACHE_TIMEOUT = 0
+
+# Доля запросов, для которых считаются SQL и шаблоны (заголовок
+# Server-Timing и строка в логе yatube.timing)
+SERVER_TIMING_SAMPLE_RATE = 0.05
+
+# manage.py test запускает тесты без этой выборки (core.test_runner)
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Каталог, где процессы хранят значения метрик для /metrics
+METRICS_DIR = os.environ.get(
+    'YATUBE_METRICS_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+)
+# Адреса, которым доступен /metrics (пустой список — всем)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'yatube.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -2,6 +2,8 @@
 WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+With ``YATUBE_WARM_START=1`` the process is warmed up before it accepts
+requests (see ``core.warmup``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
@@ -9,8 +11,14 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.WARM_START:
+    from core.warmup import warm_up
+
+    warm_up()